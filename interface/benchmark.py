@@ -0,0 +1,496 @@
+"""
+This file is part ot the MicroWind software to control and plot data of a wind tunnel including a miniature wind turbine
+Copyright (c) 2024 Institute for Wind Energy Systems, Leibniz University Hannover
+The MicroWind software is licensed under GPLv3
+Authors: Felix Prigge
+"""
+
+import sys
+import os
+import pathlib
+import json
+import platform
+import tempfile
+import timeit
+import types
+import io
+import contextlib
+# Paths given on the command line are relative to the calling directory
+arguments = [os.path.abspath(argument) if argument.endswith('.json') else argument for argument in sys.argv[1:]]
+# Set working directory to interface/
+os.chdir(str(pathlib.Path(__file__).parent.resolve()))
+# Add parent directory to search path so modules can be imported with absolute paths
+sys.path.append(str(pathlib.Path(__file__).parent.parent.resolve()))
+import tkinter as TK
+import numpy as np
+from interface.modules.driver import Driver
+from interface.modules.simulator import SimulatedArduino
+from interface.modules.clock import VirtualClock
+from interface.modules.logger import Logger
+from interface.modules.windprofile import WindProfile, TurbulentWind
+from interface.modules.gui.charts.chart1a import Chart1a
+from interface.modules.gui.charts.chart1b import Chart1b
+from interface.modules.gui.charts.chart2 import Chart2
+from interface.modules.gui.charts.chart3 import Chart3
+from interface.modules.gui.charts.chart4 import Chart4
+from interface.modules.gui.charts.raster_canvas import RASTER_AVAILABLE, RasterItems, RasterCanvas
+import interface.modules.gui.charts.chart as chart_module
+import interface.modules.gui.charts.chart2 as chart2_module
+import interface.modules.gui.charts.chart4 as chart4_module
+
+# CONSTANTS
+REPEAT = 5
+TOLERANCE = 0.2  # Relative slow down reported as regression
+CHART_WIDTH = 1000
+CHART_HEIGHT = 600
+
+
+class StubCanvas:
+    """Stub canvas
+    Stands in for a tkinter canvas without a display. Keeps the coordinates and options of the items,
+    so the python side of the chart updates is measured without the drawing.
+    Calls and scripts sent directly to the tcl interpreter are counted, not executed."""
+
+    def __init__(self, width=CHART_WIDTH, height=CHART_HEIGHT):
+        self.width = width
+        self.height = height
+        self.canvas_items = dict()
+        self.canvas_counter = 0
+        self.tk = self  # Stands in for the tcl interpreter as well
+        self.tcl_calls = 0
+
+    def __str__(self):
+        return '.stub_canvas'
+
+    def eval(self, script):
+        self.tcl_calls += 1
+
+    def call(self, *args):
+        self.tcl_calls += 1
+
+    def __create(self, *args, **kw):
+        self.canvas_counter += 1
+        self.canvas_items[self.canvas_counter] = [args, kw]
+        return self.canvas_counter
+
+    def create_line(self, *args, **kw):
+        return self.__create(*args, **kw)
+
+    def create_oval(self, *args, **kw):
+        return self.__create(*args, **kw)
+
+    def create_rectangle(self, *args, **kw):
+        return self.__create(*args, **kw)
+
+    def create_text(self, *args, **kw):
+        return self.__create(*args, **kw)
+
+    def create_window(self, *args, **kw):
+        return self.__create(*args, **kw)
+
+    def coords(self, item, *args):
+        self.canvas_items[item][0] = args
+
+    def itemconfig(self, item, **kw):
+        self.canvas_items[item][1].update(kw)
+
+    def delete(self, *items):
+        for item in items:
+            self.canvas_items.pop(item, None)
+
+    def tag_raise(self, tag):
+        pass
+
+    def move(self, tag, dx, dy):
+        pass
+
+    def bind(self, sequence, function, add=None):
+        pass
+
+    def winfo_ismapped(self):
+        return True
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+
+class StubRasterCanvas(RasterItems, StubCanvas):
+    """Stub raster canvas
+    Raster items on the stub canvas. The frames are rendered by the benchmark instead of the tk event loop."""
+
+    def __init__(self, width=CHART_WIDTH, height=CHART_HEIGHT):
+        StubCanvas.__init__(self, width, height)
+        RasterItems.__init__(self)
+
+
+class StubWidget:
+    """Stub widget
+    Stands in for tkinter frames, labels, buttons and check buttons without a display. Accepts every option
+    and geometry call and reports a fixed size."""
+
+    def __init__(self, *args, **kw):
+        pass
+
+    def configure(self, **kw):
+        pass
+
+    def grid(self, **kw):
+        pass
+
+    def pack(self, **kw):
+        pass
+
+    def destroy(self):
+        pass
+
+    def winfo_width(self):
+        return 150
+
+    def winfo_height(self):
+        return 150
+
+
+class StubVariable:
+    """Stub variable
+    Stands in for the tkinter variables, which require a tcl interpreter."""
+
+    def __init__(self, master=None, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class StubRoot:
+    """Stub root
+    Stands in for the root window. Scheduled calls are discarded, the benchmark calls the loops itself."""
+
+    def after(self, delay, function=None):
+        pass
+
+    def after_idle(self, function):
+        pass
+
+
+class StubWindow:
+    """Stub main window
+    Stands in for MainWindow without a display. Holds the variables and widgets read by GUIManager.cycle
+    with the initial values of the main window and creates the charts on stub canvases."""
+
+    def __init__(self, window, manager):
+        self.window = StubRoot()
+        self.var_radio_wind = StubVariable(value=2)
+        self.var_wind = StubVariable(value=0)
+        self.var_radio_turbine = StubVariable(value=2)
+        self.var_pitch = StubVariable(value=45)
+        self.var_torque = StubVariable(value=0)
+        self.notification = StubWidget()
+        self.label_torque_value = StubWidget()
+        self.button_turbine_start = StubWidget()
+        self.button_data_logger = StubWidget()
+        self.label_profile = StubWidget()
+        manager.C1 = Chart1a(StubCanvas())
+        manager.C2 = Chart2(StubCanvas(), manager.clock, window=manager.TIME_WINDOW,
+                            history_length=int(round(manager.HISTORY_DURATION * manager.LOOP_RATE)))
+        manager.C3 = Chart3(StubCanvas())
+
+
+def stub_widgets():
+    # Without a display, the tkinter widgets and variables of the charts and the main window are replaced by stubs
+    stub_tk = types.SimpleNamespace(Frame=StubWidget, Checkbutton=StubWidget, BooleanVar=StubVariable)
+    for module in (chart_module, chart2_module, chart4_module):
+        module.TK = stub_tk
+    for module in (chart2_module, chart4_module):
+        module.ttk = stub_tk
+    from interface.modules import gui_manager
+    gui_manager.MainWindow = StubWindow
+
+
+def measure(function, number):
+    # Median time per call in us
+    times = timeit.Timer(function).repeat(repeat=REPEAT, number=number)
+    return float(np.median(times) / number * 1e6)
+
+
+def simulated_driver():
+    # Driver running on the simulated arduino with the turbine in operation
+    clock = VirtualClock(step=0.05)
+    driver = Driver(SimulatedArduino(time_step=None, clock=clock, seed=0), clock)
+    driver.v_set = 4
+    driver.torque_level = 6
+    for i in range(100):
+        clock.tick()
+        driver.read_from_arduino()
+        driver.write_to_arduino()
+    return driver, clock
+
+
+def benchmark_driver(results):
+    driver, clock = simulated_driver()
+    frames = []
+    for i in range(200):
+        frames.append(driver.request_frame())
+        driver.send_command()
+    state = {'i': 0, 't': clock.time()}
+
+    def calculate_input():
+        state['t'] += 0.05
+        state['i'] += 1
+        driver.process_frame(frames[state['i'] % len(frames)], state['t'])
+
+    results['calculate_input'] = measure(calculate_input, 2000)
+
+    def exchange():
+        clock.tick()
+        driver.read_from_arduino()
+        driver.write_to_arduino()
+
+    results['simulated_exchange'] = measure(exchange, 500)
+
+
+def benchmark_logger(results, directory):
+    driver, clock = simulated_driver()
+    logger = Logger(os.path.join(directory, 'benchmark.bin'))
+    logger.start()
+    sample = driver.sample()
+    results['logger_log'] = measure(lambda: logger.log(sample, timestamp=clock.time()), 10000)
+    logger.end()
+
+
+def benchmark_wind(results, directory):
+    # Long turbulent series at 20 Hz
+    file_name = os.path.join(directory, 'benchmark_wind.txt')
+    with open(file_name, 'w') as file:
+        file.write('#\n' * 8)
+        t = np.arange(100000) * 0.05
+        np.savetxt(file, np.column_stack((t, 3 + np.sin(t))), fmt='%.3f', delimiter=', ')
+    for mode in ('step', 'linear', 'cubic'):
+        clock = VirtualClock()
+        profile = WindProfile(file_name, clock, mode=mode, loop=True)
+
+        def calc():
+            clock.advance(0.05)
+            profile.calc()
+
+        results['wind_profile_' + mode] = measure(calc, 5000)
+
+    clock = VirtualClock()
+    turbulent_wind = TurbulentWind(clock, seed=0)
+
+    def calc():
+        clock.advance(0.05)
+        turbulent_wind.calc(3)
+
+    results['turbulent_wind'] = measure(calc, 5000)
+
+
+def recorded_states():
+    # Recorded states of the driver in operation, fed to the charts so only the update of the chart is measured
+    driver, clock = simulated_driver()
+    states = []
+    for i in range(200):
+        clock.tick()
+        driver.read_from_arduino()
+        driver.write_to_arduino()
+        states.append(driver.sample())
+    return states, clock
+
+
+def chart_classes(clock):
+    return {'chart1a': lambda canvas: Chart1a(canvas),
+            'chart1b': lambda canvas: Chart1b(canvas),
+            'chart2': lambda canvas: Chart2(canvas, clock),
+            'chart3': lambda canvas: Chart3(canvas),
+            'chart4': lambda canvas: Chart4(canvas)}
+
+
+def benchmark_charts(results, root):
+    states, clock = recorded_states()
+    state = {'i': 0}
+    charts = chart_classes(clock)
+    for name, chart_class in charts.items():
+        if root is None:
+            canvas = StubCanvas()
+        else:
+            canvas = TK.Canvas(root, width=CHART_WIDTH, height=CHART_HEIGHT, highlightthickness=0)
+            canvas.pack()
+            root.update()
+        chart = chart_class(canvas)
+
+        def update():
+            clock.tick()
+            state['i'] += 1
+            sample = states[state['i'] % len(states)]
+            if name == 'chart2':
+                # The gui loop appends every sample to the time series, stamped with the current time
+                chart.append(sample._replace(time=clock.time()))
+            chart.update(sample)
+            if root is not None:
+                root.update_idletasks()
+
+        results[name + '_update'] = measure(update, 200)
+        if root is not None:
+            canvas.destroy()
+
+    # Switching between the types of chart1 on one canvas, both charts are kept
+    if root is None:
+        canvas = StubCanvas()
+    else:
+        canvas = TK.Canvas(root, width=CHART_WIDTH, height=CHART_HEIGHT, highlightthickness=0)
+        canvas.pack()
+        root.update()
+    chart1_types = [Chart1a(canvas)]
+    chart1_types.append(Chart1b(canvas, chart1_types[0].dots))
+    chart1_types[1].update(states[0])
+    chart1_types[1].hide()
+
+    def switch():
+        state['i'] += 1
+        [old, new] = chart1_types if state['i'] % 2 else chart1_types[::-1]
+        old.hide()
+        new.show()
+        new.update(states[state['i'] % len(states)])
+        if root is not None:
+            root.update_idletasks()
+
+    results['chart1_switch'] = measure(switch, 200)
+    if root is not None:
+        canvas.destroy()
+
+
+def benchmark_raster(results, root):
+    # Charts drawn into images (RasterCanvas) including the render of the frame, requires Pillow
+    states, clock = recorded_states()
+    state = {'i': 0}
+    for name, chart_class in chart_classes(clock).items():
+        if not RASTER_AVAILABLE:
+            results[name + '_raster'] = None
+            continue
+        if root is None:
+            canvas = StubRasterCanvas()
+        else:
+            canvas = RasterCanvas(root, width=CHART_WIDTH, height=CHART_HEIGHT, highlightthickness=0)
+            canvas.pack()
+            root.update()
+        chart = chart_class(canvas)
+
+        def update():
+            clock.tick()
+            state['i'] += 1
+            sample = states[state['i'] % len(states)]
+            if name == 'chart2':
+                chart.append(sample._replace(time=clock.time()))
+            chart.update(sample)
+            if root is None:
+                canvas.render_frame((CHART_WIDTH, CHART_HEIGHT))
+            else:
+                root.update_idletasks()
+
+        results[name + '_raster'] = measure(update, 50)
+        if root is not None:
+            canvas.destroy()
+
+
+def benchmark_gui_cycle(results, root):
+    # Complete cycles of the gui loop on the simulated arduino, without a display on the stub window
+    from interface.modules.gui_manager import GUIManager
+    clock = VirtualClock(step=0.05)
+    driver = Driver(SimulatedArduino(time_step=None, clock=clock, seed=0), clock)
+    manager = GUIManager(root, driver, Logger(), fast=True)
+    if root is not None:
+        root.update()
+
+    def cycle():
+        manager.run()
+        if root is not None:
+            root.update_idletasks()
+
+    # The driver prints its values to the terminal every 20 cycles
+    with contextlib.redirect_stdout(io.StringIO()):
+        results['gui_cycle'] = measure(cycle, 100)
+    if root is not None:
+        manager.window.window.destroy()
+
+
+def run():
+    try:
+        root = TK.Tk()
+        root.geometry(str(CHART_WIDTH) + 'x' + str(CHART_HEIGHT))
+    except TK.TclError:
+        print('no display, charts and gui cycles are measured on stub widgets')
+        root = None
+        stub_widgets()
+
+    results = dict()
+    with tempfile.TemporaryDirectory() as directory:
+        benchmark_driver(results)
+        benchmark_logger(results, directory)
+        benchmark_wind(results, directory)
+    benchmark_charts(results, root)
+    benchmark_raster(results, root)
+    benchmark_gui_cycle(results, root)
+    if root is not None:
+        root.destroy()
+
+    return {'python': platform.python_version(),
+            'platform': platform.platform(),
+            'display': root is not None,
+            'unit': 'us per call',
+            'results': results}
+
+
+def print_results(benchmark, baseline=None):
+    regressions = []
+    for name, value in benchmark['results'].items():
+        line = f'{name:<24}'
+        line += f'{value:>12.1f} us' if value is not None else f'{"skipped":>15}'
+        base = baseline['results'].get(name) if baseline is not None else None
+        if value is not None and base is not None:
+            ratio = value / base
+            line += f'{base:>12.1f} us{ratio:>8.2f}x'
+            if ratio > 1 + TOLERANCE:
+                line += '  REGRESSION'
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main():
+    """Benchmark
+    Measures the cost of the driver calculation, logger, wind sources, chart updates and full gui cycles
+    on the simulated arduino. Runs without arduino. Without a display, charts are measured on stub widgets.
+    Usage:
+        py interface/benchmark.py                           print results
+        py interface/benchmark.py --save baseline.json      store results as baseline
+        py interface/benchmark.py --compare baseline.json   compare with a baseline, exits with 1 on regressions
+    """
+    if '--help' in arguments:
+        print(main.__doc__)
+        return
+
+    benchmark = run()
+    baseline = None
+    if '--compare' in arguments:
+        with open(arguments[arguments.index('--compare') + 1], 'r') as file:
+            baseline = json.load(file)
+    regressions = print_results(benchmark, baseline)
+
+    if '--save' in arguments:
+        file_name = arguments[arguments.index('--save') + 1]
+        with open(file_name, 'w') as file:
+            json.dump(benchmark, file, indent=4)
+        print('Saved baseline to ' + file_name)
+
+    if regressions:
+        print('Regressions larger than ' + str(int(TOLERANCE * 100)) + '%: ' + ', '.join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -16,16 +16,43 @@ sys.path.append(str(pathlib.Path(__file__).parent.parent.resolve()))
 from interface.modules.gui_manager import GUIManager
 from interface.modules.driver import Driver
 from interface.modules.logger import Logger
+from interface.modules.simulator import SimulatedArduino
+from interface.modules.capture import ReplayTransport
+from interface.modules.clock import Clock, VirtualClock
 
 
 def main():
     """MicroWind Interface
-    This function initializes and runs the interface to control the turbine and visualize the data
+    This function initializes and runs the interface to control the turbine and visualize the data.
+    Start with --simulate to run the interface against the simulated arduino instead of the wind tunnel.
+    Start with --capture to record all raw frames exchanged with the arduino to capture.bin.
+    Start with --replay <capture file> to replay a capture instead.
+    Add --fast to replay or simulate as fast as possible instead of in real time.
+    Start with --profile to show the duration of the loop stages and export them to profile.json on exit.
+    Start with --rate <Hz> to run the loop at another rate than 20 Hz.
+    Start with --window <s> to show another time span than 6 s in the time series, up to 60 s are kept by default.
+    Start with --raster to draw the charts into images with anti-aliasing, requires Pillow.
+    Start with --release-charts to delete hidden charts instead of keeping them, to save memory.
     """
+    rate = number_argument('--rate', 20)
+    window = number_argument('--window', 6)
     root = Tk()
-    driver = Driver()
+    fast = '--fast' in sys.argv
+    if '--replay' in sys.argv:
+        clock = VirtualClock()
+        transport = ReplayTransport(sys.argv[sys.argv.index('--replay') + 1], clock, real_time=not fast)
+        driver = Driver(transport, clock)
+    elif '--simulate' in sys.argv:
+        # Fast simulations advance the virtual clock by one regular cycle per loop
+        clock = VirtualClock(step=0.05) if fast else Clock()
+        driver = Driver(SimulatedArduino(time_step=None, clock=clock), clock)
+    else:
+        driver = Driver()
+    if '--capture' in sys.argv:
+        driver.start_capture()
     logger = Logger()
-    manager = GUIManager(root, driver, logger)
+    manager = GUIManager(root, driver, logger, fast=fast, profile='--profile' in sys.argv, rate=rate, window=window,
+                         raster='--raster' in sys.argv, release_charts='--release-charts' in sys.argv)
 
     # handle window exit
     def set_close_flag():
@@ -42,5 +69,18 @@ def main():
     return
 
 
+def number_argument(option, default):
+    # Positive number following the option on the command line, the default if the option is not given
+    if option not in sys.argv:
+        return default
+    try:
+        value = float(sys.argv[sys.argv.index(option) + 1])
+    except (IndexError, ValueError):
+        value = 0
+    if not 0 < value < float('inf'):
+        sys.exit(option + ' requires a number greater than 0')
+    return value
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,82 @@
+"""
+This file is part ot the MicroWind software to control and plot data of a wind tunnel including a miniature wind turbine
+Copyright (c) 2024 Institute for Wind Energy Systems, Leibniz University Hannover
+The MicroWind software is licensed under GPLv3
+Authors: Felix Prigge
+"""
+
+import time
+import threading
+import warnings
+from interface.modules.driver import TransmissionWarning
+
+
+class RingBuffer:
+    """Ring buffer
+    Fixed size buffer for one producer and one consumer thread.
+    The producer fills the slot first and increments the counter afterward,
+    so the consumer never sees a half written slot and no lock is required."""
+
+    def __init__(self, size):
+        self.size = size
+        self.slots = [None] * size
+        self.count = 0  # Total number of items put into the buffer
+
+    def put(self, item):
+        self.slots[self.count % self.size] = item
+        self.count += 1
+
+    def read(self, start):
+        # Items put since counter value start. Items already overwritten are skipped.
+        # Returns the items and the counter value to continue from
+        count = self.count
+        start = max(start, count - self.size)
+        return [self.slots[i % self.size] for i in range(start, count)], count
+
+
+class Acquisition(threading.Thread):
+    """Acquisition thread
+    Owns the serial port of the driver and exchanges data with the arduino at a fixed rate, independent of the gui loop.
+    Every received data frame is published as (counter, timestamp, frame) into a ring buffer.
+    The command frame sent back is built from the latest set values of the driver."""
+
+    def __init__(self, driver, rate=20, buffer_size=256):
+        super().__init__(daemon=True)
+        self.driver = driver
+        self.period = 1 / rate
+        self.buffer = RingBuffer(buffer_size)
+        self.running = False
+        self.counter_last = 0  # Counter of the last sample handed to the consumer
+
+    def run(self):
+        self.running = True
+        deadline = time.perf_counter()
+        while self.running:
+            try:
+                frame = self.driver.request_frame()
+                self.buffer.put((self.buffer.count, self.driver.clock.now(), frame))
+                self.driver.send_command()
+            except:
+                warnings.warn('serial connection lost in acquisition thread', TransmissionWarning)
+                self.driver.port.close()
+                self.driver.arduino_connected = False
+                self.running = False
+                return
+
+            # Sleep until the next deadline. Restart the schedule if the port blocked longer than one period
+            deadline += self.period
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                deadline = time.perf_counter()
+
+    def read(self):
+        # Samples received since the last call, oldest first
+        [samples, self.counter_last] = self.buffer.read(self.counter_last)
+        return samples
+
+    def stop(self):
+        self.running = False
+        if self.is_alive():
+            self.join()
@@ -5,12 +5,12 @@ The MicroWind software is licensed under GPLv3
 Authors: Felix Prigge
 """
 
-import time
 import datetime
 import pandas as pd
 from interface.modules.gui.arcade.arcade_window import ArcadeWindow
 from interface.modules.gui.arcade.gameover_window import GameOverWindow
 from interface.modules.windprofile import WindProfile
+from interface.modules.scheduler import LoopScheduler
 
 
 class ArcadeGame:
@@ -20,7 +20,7 @@ class ArcadeGame:
 
     def __init__(self, main_manager):
         # CONSTANTS
-        self.REFRESH = 50
+        self.LOOP_RATE = 20  # Hz
 
         self.WIND_MIN = 1
         self.WIND_MAX = 3
@@ -39,11 +39,13 @@ class ArcadeGame:
         # Handles
         self.driver = main_manager.driver
         self.main_manager = main_manager
+        self.clock = main_manager.clock
+        self.scheduler = LoopScheduler(self.LOOP_RATE, decimate=False)
 
         # Variables
-        self.last_loop = time.time()
-        self.game_over_time = time.time()
-        self.game_stop_time = time.time()
+        self.last_loop = self.clock.time()
+        self.game_over_time = self.clock.time()
+        self.game_stop_time = self.clock.time()
         self.dt = 0
         self.power = 0
         self.score = 0
@@ -69,18 +71,26 @@ class ArcadeGame:
         self.arcade_window = ArcadeWindow(self)
 
     def run(self):
-        if self.main_manager.arcade_flag:
-            # Run arcade window loop
-            self.arcade_window.window.after(self.REFRESH, self.run)
-        else:
+        if not self.main_manager.arcade_flag:
             print("return to main manager")
             self.arcade_window.window.destroy()
             self.main_manager.run()
             return
 
-        if self.driver.arduino_connected:
-            # Read from arduino
-            self.driver.read_from_arduino()
+        # Run arcade window loop. The next cycle is scheduled after this one, also if it fails
+        self.scheduler.begin()
+        try:
+            self.cycle()
+        finally:
+            self.arcade_window.window.after(self.scheduler.delay(), self.run)
+
+    def cycle(self):
+        # Start new cycle
+        self.clock.tick()
+
+        # Read from arduino. The stages of receiving are timed from the start of this cycle
+        self.main_manager.profiler.begin()
+        self.main_manager.receive()
 
         # Calculate input
         self.calculate()
@@ -94,8 +104,8 @@ class ArcadeGame:
             # Set wind speed
             self.driver.v_set = self.wind_profile.calc()
 
-        if self.driver.arduino_connected:
-            self.driver.write_to_arduino()
+        # Write to arduino
+        self.main_manager.transmit()
 
         # Refresh widgets
         self.arcade_window.move_cloud()
@@ -116,7 +126,7 @@ class ArcadeGame:
                     self.arcade_window.show_game_over()
                 if self.game_restart_flag:
                     self.arcade_window.show_get_ready()
-                if time.time() - self.game_stop_time > self.NEW_GAME_DELAY:
+                if self.clock.time() - self.game_stop_time > self.NEW_GAME_DELAY:
                     self.game_over_flag = False
                     if self.name_input_flag:
                         # Open window for name input
@@ -151,13 +161,13 @@ class ArcadeGame:
 
     def stop_game(self):
         self.driver.v_set = self.WIND_MIN
-        self.game_stop_time = time.time()
+        self.game_stop_time = self.clock.time()
         self.game_run_flag = False
         self.game_over_flag = True
 
     def restart_game(self):
         self.driver.v_set = self.WIND_MIN
-        self.game_stop_time = time.time()
+        self.game_stop_time = self.clock.time()
         self.game_run_flag = False
         self.game_restart_flag = True
 
@@ -168,19 +178,18 @@ class ArcadeGame:
         self.score = 0
         self.arcade_window.graphics_bird.reset()
         self.damage = 0
-        with open('wind/arcade.txt', 'rt') as file:
-            self.open_wind_profile(file)
+        self.open_wind_profile('wind/arcade.txt')
 
-    def open_wind_profile(self, file):
-        self.wind_profile = WindProfile(file)
+    def open_wind_profile(self, file_name):
+        self.wind_profile = WindProfile(file_name, self.clock)
 
     def increment_score(self):
         self.score += self.power * self.dt
 
     def calculate(self):
         # Internal calculations
-        self.dt = time.time()-self.last_loop
-        self.last_loop = time.time()
+        self.dt = self.clock.time()-self.last_loop
+        self.last_loop = self.clock.time()
         speed_over = self.driver.rot_turb - self.SPEED_R
         self.damage += self.DAMAGE_STATIC_INC * self.dt
         if speed_over > 0:
@@ -0,0 +1,194 @@
+"""
+This file is part ot the MicroWind software to control and plot data of a wind tunnel including a miniature wind turbine
+Copyright (c) 2024 Institute for Wind Energy Systems, Leibniz University Hannover
+The MicroWind software is licensed under GPLv3
+Authors: Felix Prigge
+"""
+
+import os
+import time
+import warnings
+from interface.modules.transport import Transport
+from interface.modules.clock import Clock
+
+# Capture file: MAGIC followed by records of kind (1 byte), clock time in ns (8 bytes) and the undecoded frame
+MAGIC = b'MWCAP\x01'
+DATA = b'D'  # 16 byte data frame received from the arduino
+COMMAND = b'C'  # 5 byte command frame sent to the arduino
+SESSION = b'S'  # Start of a capture session, without frame
+FRAME_SIZE = {DATA: 16, COMMAND: 5, SESSION: 0}
+PERIOD = 50000000  # [ns] Assumed time between data frames if a session holds only one
+
+
+class Capture:
+    """Raw frame capture
+    Appends every data and command frame exchanged with the arduino verbatim to a binary file,
+    so all values can be derived again later, e.g. after a recalibration.
+    Frames are stamped in ns with the clock of the driver, the same time base the driver calculates with.
+    Every capture starts with a session record, so replays can separate the sessions appended to one file.
+    The file is flushed every FLUSH_INTERVAL seconds, an incomplete last record after a crash is cut off."""
+
+    def __init__(self, file_name='capture.bin', clock=None):
+        # CONSTANTS
+        self.FLUSH_INTERVAL = 1  # [s] Longest time records are kept in the file buffer
+
+        self.file_name = file_name
+        self.clock = clock if clock is not None else Clock()
+        if os.path.isfile(file_name) and os.path.getsize(file_name) > 0:
+            # Append to an existing capture only if it can be read
+            try:
+                length = read_records(file_name)[1]
+            except ValueError:
+                length = None
+            if length is None:
+                name, extension = os.path.splitext(file_name)
+                self.file_name = name + time.strftime('_%Y-%m-%d_%H-%M-%S') + extension
+                warnings.warn('unreadable capture file, writing to ' + self.file_name)
+            elif length < os.path.getsize(file_name):
+                # Cut off an incomplete last record, e.g. after a crash, so appended records stay aligned
+                os.truncate(file_name, length)
+        self.file = open(self.file_name, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        self.time_flush = time.monotonic()
+        self.record(SESSION, b'')
+
+    def record(self, kind, frame):
+        self.file.write(kind + self.clock.now_ns().to_bytes(8, byteorder='little') + frame)
+        if time.monotonic() - self.time_flush > self.FLUSH_INTERVAL:
+            self.time_flush = time.monotonic()
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def read_capture(file_name):
+    """Read capture
+    Returns all records of a capture file as list of (kind, timestamp in ns, frame)"""
+
+    return read_records(file_name)[0]
+
+
+def read_records(file_name):
+    """Read capture records
+    Returns all complete records of a capture file and the position after the last of them."""
+
+    with open(file_name, 'rb') as file:
+        content = file.read()
+    if content[0:len(MAGIC)] != MAGIC:
+        raise ValueError(file_name + ' is not a MicroWind capture')
+
+    records = []
+    i = len(MAGIC)
+    while i < len(content):
+        kind = content[i:i + 1]
+        if kind not in FRAME_SIZE:
+            raise ValueError('corrupt record in ' + file_name + ' at byte ' + str(i))
+        end = i + 9 + FRAME_SIZE[kind]
+        if end > len(content):
+            # Incomplete last record
+            break
+        records.append((kind, int.from_bytes(content[i + 1:i + 9], byteorder='little'), content[i + 9:end]))
+        i = end
+    return records, i
+
+
+def split_sessions(records):
+    """Split capture
+    Returns the records of every capture session in the file as separate list, without the session records.
+    Captures without session records form one session."""
+
+    sessions = [[]]
+    for record in records:
+        if record[0] == SESSION:
+            sessions.append([])
+        else:
+            sessions[-1].append(record)
+    return [session for session in sessions if len(session) > 0]
+
+
+def frame_period(timestamps):
+    # Time between the first two data frames of a session in ns
+    return timestamps[1] - timestamps[0] if len(timestamps) > 1 else PERIOD
+
+
+def replay(file_name, driver):
+    """Replay capture
+    Feeds the recorded frames back through the driver: command frames restore the set values,
+    data frames are processed with their recorded timestamp. Yields the driver after every data frame."""
+
+    for session in split_sessions(read_capture(file_name)):
+        timestamps = [timestamp for kind, timestamp, frame in session if kind == DATA]
+        if len(timestamps) > 0:
+            # Start every session with a regular time step instead of the time since the previous session
+            driver.time_last = (timestamps[0] - frame_period(timestamps)) * 1e-9
+
+        for kind, timestamp, frame in session:
+            if kind == COMMAND:
+                driver.decode_command(frame)
+            else:
+                driver.process_frame(frame, timestamp * 1e-9)
+                yield driver
+
+
+class ReplayTransport(Transport):
+    """Replay transport
+    Answers the data requests of the driver with the data frames of a capture instead of a live arduino.
+    Command frames sent by the driver are discarded, so controllers can be compared on identical inputs.
+    The virtual clock is set to the recorded timestamp of every frame handed out.
+    Sessions appended to the same capture are replayed one after another, without the time in between.
+    Every request returns the next frame, so every frame is processed once and the replay runs as fast as the loop
+    calling it. In real time mode, due() tells whether the elapsed wall time since the first request has reached the
+    recording time of the next frame, so the loop can wait for it instead of processing a frame twice."""
+
+    def __init__(self, file_name, clock, real_time=True):
+        super().__init__()
+        self.clock = clock
+        self.real_time = real_time
+        self.frames = []
+        for session in split_sessions(read_capture(file_name)):
+            frames = [(timestamp, frame) for kind, timestamp, frame in session if kind == DATA]
+            if len(frames) == 0:
+                continue
+            # Every session continues one recording period after the last frame of the previous session
+            shift = 0
+            if len(self.frames) > 0:
+                timestamps = [timestamp for timestamp, frame in frames]
+                shift = self.frames[-1][0] + frame_period(timestamps) * 1e-9 - timestamps[0] * 1e-9
+            self.frames += [(timestamp * 1e-9 + shift, frame) for timestamp, frame in frames]
+        self.i_frame = -1
+        self.time_start = None
+        self.finished = len(self.frames) == 0
+        self.tx_buffer = b''
+        if not self.finished:
+            # Start one recording period before the first frame
+            period = self.frames[1][0] - self.frames[0][0] if len(self.frames) > 1 else 0.05
+            self.clock.set(self.frames[0][0] - period)
+
+    def write(self, data):
+        if len(data) == 1 and not self.finished:
+            # Data request
+            if self.time_start is None:
+                self.time_start = time.perf_counter()
+            self.i_frame += 1
+            timestamp, self.tx_buffer = self.frames[self.i_frame]
+            self.clock.set(timestamp)
+            self.finished = self.i_frame + 1 >= len(self.frames)
+        return len(data)
+
+    def due(self):
+        # True if the next frame can be requested
+        if self.finished:
+            return False
+        if not self.real_time or self.time_start is None:
+            return True
+        return self.frames[self.i_frame + 1][0] <= self.frames[0][0] + time.perf_counter() - self.time_start
+
+    def read(self, size=1):
+        data = self.tx_buffer[0:size]
+        self.tx_buffer = self.tx_buffer[size:]
+        return data
+
+    def flushInput(self):
+        self.tx_buffer = b''
@@ -0,0 +1,76 @@
+"""
+This file is part ot the MicroWind software to control and plot data of a wind tunnel including a miniature wind turbine
+Copyright (c) 2024 Institute for Wind Energy Systems, Leibniz University Hannover
+The MicroWind software is licensed under GPLv3
+Authors: Felix Prigge
+"""
+
+import time
+
+
+class Clock:
+    """Monotonic clock
+    Time source shared by the driver, gui manager, charts, wind profiles and the arcade game.
+    Based on time.perf_counter() and shifted to the wall clock time at initialization, so timestamps stay comparable
+    to time.time() but never jump. now_ns() returns the same time in integer nanoseconds at full resolution.
+    The loop owning the clock calls tick() at the start of every cycle.
+    From then on, time() returns the start of the current cycle, so all components calculate with the same time."""
+
+    def __init__(self):
+        self.offset_ns = time.time_ns() - time.perf_counter_ns()
+        self.offset = self.offset_ns * 1e-9
+        self.cycle_time = None  # Start of the current cycle. None until the first tick
+        self.tick_last = self.now()
+
+    def now(self):
+        # Current time, independent of the cycle
+        return time.perf_counter() + self.offset
+
+    def now_ns(self):
+        # Current time in ns
+        return time.perf_counter_ns() + self.offset_ns
+
+    def time(self):
+        # Time of the current cycle
+        if self.cycle_time is None:
+            return self.now()
+        return self.cycle_time
+
+    def tick(self):
+        # Start a new cycle. Returns the time since the last tick
+        self.cycle_time = self.now()
+        dt = self.cycle_time - self.tick_last
+        self.tick_last = self.cycle_time
+        return dt
+
+
+class VirtualClock(Clock):
+    """Virtual clock
+    Only advances when told to: by a fixed step with every tick, or by set() and advance(), e.g. from the replay transport.
+    Makes runs independent of the wall clock and allows simulations faster than real time."""
+
+    def __init__(self, start=0, step=None):
+        self.t = start
+        self.step = step
+        self.cycle_time = None
+        self.tick_last = start
+
+    def now(self):
+        return self.t
+
+    def now_ns(self):
+        return round(self.t * 1e9)
+
+    def time(self):
+        return self.t
+
+    def tick(self):
+        if self.step is not None:
+            self.t += self.step
+        return super().tick()
+
+    def set(self, t):
+        self.t = t
+
+    def advance(self, dt):
+        self.t += dt
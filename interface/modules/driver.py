@@ -13,15 +13,20 @@ import serial
 import serial.tools.list_ports
 import warnings
 import interface.data.calibration_data as cal
+from interface.modules.clock import Clock
+from interface.modules.capture import Capture, DATA, COMMAND
+from interface.modules.sample import Sample
 
 
 class Driver:
     """MicroWind driver class
     Stores all data, performs internal calculations and is responsible for communication with the arduino.
     Can be used as a standalone command line control tool.
+    Communicates via the serial port of the first connected arduino, unless a different transport
+    (e.g. the SimulatedArduino) is passed. Time is taken from the given clock, a monotonic clock by default.
     """
 
-    def __init__(self):
+    def __init__(self, transport=None, clock=None):
         # CONSTANTS
         self.AIR_DENS = 1.225
         self.ROTOR_RADIUS = 0.16
@@ -60,9 +65,13 @@ class Driver:
         self.torque_level = 0  # Protected property. Uses setter method for safety
         self.led = True
 
+        # Time source
+        self.clock = clock if clock is not None else Clock()
+
         # Output variables
-        self.time_last = time.time()
+        self.time_last = self.clock.time()
         self.dt = 1
+        self.dt_cycle = 0
         self.dt_rw = 0
         self.dt_r = 0
         self.rot_fan = 0
@@ -104,11 +113,23 @@ class Driver:
         self.arduino_connected = False
         self.data_received = False
         self.torque_flip = 0.5
-        self.attach_arduino()
+        self.attach_arduino(transport)
+
+        # Optional capture of the raw frames
+        self.capture = None
+
+        # Constants shared with the samples
+        self.constants = {name: value for name, value in vars(self).items() if name.isupper()}
 
     # Data transfer
     # Initialize serial connection
-    def attach_arduino(self):
+    def attach_arduino(self, transport=None):
+        if transport is not None:
+            # Use the given transport instead of searching for a serial port
+            self.port = transport
+            self.arduino_connected = True
+            return
+
         arduino_ports = [
             p.device
             for p in serial.tools.list_ports.comports()
@@ -124,36 +145,31 @@ class Driver:
 
     # Receive data
     def read_from_arduino(self):
+        frame = self.receive_frame()
+        if frame is not None:
+            self.decode_frame(frame)
+        self.__calculate_input()
+
+    # Request a data frame in turn with the command frames. None if no frame was received
+    def receive_frame(self):
         try:
             if not self.data_received:
-                self.port.write((1).to_bytes(1, byteorder='little'))
-                read_data = self.port.read(16)
-                self.port.flushInput()
-                self.rot_fan = int.from_bytes(read_data[0:2], byteorder='little')
-                self.rot_turb = int.from_bytes(read_data[2:4], byteorder='little')
-                self.current = int.from_bytes(read_data[4:6], byteorder='little', signed=True)
-                self.voltage = int.from_bytes(read_data[6:8], byteorder='little', signed=True)
-                self.thrust = int.from_bytes(read_data[8:11], byteorder='little', signed=True)
-                self.anemometer = int.from_bytes(read_data[12:14], byteorder='little')
-                self.potentiometer = int.from_bytes(read_data[14:16], byteorder='little')
+                frame = self.request_frame()
                 self.data_received = True
+                return frame
             else:
                 warnings.warn('No data received. Transmit first.', TransmissionWarning)
         except:
             warnings.warn('serial connection lost during receiving', TransmissionWarning)
             self.port.close()
             self.arduino_connected = False
-        self.__calculate_input()
+        return None
 
     # Transmit data
     def write_to_arduino(self):
         try:
             if self.data_received:
-                self.port.write(self.fan_pwm.to_bytes(1, byteorder='little'))
-                self.port.write(self.servo_time.to_bytes(2, byteorder='little'))
-                self.port.write(self.torque_level.to_bytes(1, byteorder='little', signed=True))
-                self.port.write(self.led.to_bytes(1, byteorder='little'))
-                self.port.flushOutput()
+                self.send_command()
                 self.data_received = False
             else:
                 warnings.warn('No data transmitted. Receive first.', TransmissionWarning)
@@ -162,10 +178,79 @@ class Driver:
             self.port.close()
             self.arduino_connected = False
 
+    # Request a 16 byte data frame from the arduino
+    def request_frame(self):
+        self.port.write((1).to_bytes(1, byteorder='little'))
+        frame = self.port.read(16)
+        self.port.flushInput()
+        if self.capture is not None:
+            self.capture.record(DATA, frame)
+        return frame
+
+    # Send the 5 byte command frame to the arduino
+    def send_command(self):
+        frame = self.command_frame()
+        self.port.write(frame)
+        self.port.flushOutput()
+        if self.capture is not None:
+            self.capture.record(COMMAND, frame)
+
+    # Raw values from data frame
+    def decode_frame(self, frame):
+        self.rot_fan = int.from_bytes(frame[0:2], byteorder='little')
+        self.rot_turb = int.from_bytes(frame[2:4], byteorder='little')
+        self.current = int.from_bytes(frame[4:6], byteorder='little', signed=True)
+        self.voltage = int.from_bytes(frame[6:8], byteorder='little', signed=True)
+        self.thrust = int.from_bytes(frame[8:11], byteorder='little', signed=True)
+        self.anemometer = int.from_bytes(frame[12:14], byteorder='little')
+        self.potentiometer = int.from_bytes(frame[14:16], byteorder='little')
+
+    # 5 byte command frame from the set values
+    def command_frame(self):
+        return (self.fan_pwm.to_bytes(1, byteorder='little')
+                + self.servo_time.to_bytes(2, byteorder='little')
+                + self.torque_level.to_bytes(1, byteorder='little', signed=True)
+                + self.led.to_bytes(1, byteorder='little'))
+
+    # Set values from command frame
+    def decode_command(self, frame):
+        self.fan_pwm = frame[0]
+        self.servo_time = int.from_bytes(frame[1:3], byteorder='little')
+        self.torque_level = int.from_bytes(frame[3:4], byteorder='little', signed=True)
+        self.led = bool(frame[4])
+
+    # Start and stop recording the raw frames to file
+    def start_capture(self, file_name='capture.bin'):
+        self.capture = Capture(file_name, self.clock)
+
+    def stop_capture(self):
+        if self.capture is not None:
+            self.capture.close()
+            self.capture = None
+
+    # Decode a data frame received elsewhere (e.g. by the acquisition thread) and calculate the input values
+    def process_frame(self, frame, timestamp):
+        self.decode_frame(frame)
+        self.__calculate_input(timestamp)
+
+    # Immutable snapshot of the current values
+    def sample(self):
+        return Sample(self.time_last, self.dt, self.dt_cycle,
+                      self.v_set, self.fan_pwm, self.beta_set, self.torque_level, self.led,
+                      self.rot_fan, self.rot_turb, self.current, self.voltage, self.thrust, self.anemometer,
+                      self.potentiometer,
+                      self.beta_potentiometer, self.tip_speed, self.tip_speed_ratio, self.v_1, self.v_2, self.v_anem,
+                      self.v_rot, self.v_rel, self.phi, self.power_wind, self.power_turb, self.power_aero, self.c_p,
+                      self.c_p_aero, self.torque, self.torque_force, self.thrust_force,
+                      tuple(self.res_force.tolist()), tuple(self.lift_force.tolist()), tuple(self.drag_force.tolist()),
+                      self.constants)
+
     # Input values
-    def __calculate_input(self):
-        self.dt = time.time() - self.time_last
-        self.time_last = time.time()
+    def __calculate_input(self, timestamp=None):
+        if timestamp is None:
+            timestamp = self.clock.time()
+        self.dt = timestamp - self.time_last
+        self.time_last = timestamp
         # Tip speed
         self.tip_speed = self.rot_turb / 60 * 2 * 3.14 * self.ROTOR_RADIUS
         self.v_rot = self.tip_speed
@@ -6,12 +6,34 @@ Authors: Felix Prigge
 """
 
 
+# Tcl procedure updating both lines with one call from python. The coordinates are passed as one tcl list,
+# an empty list or state leaves the coordinates or state unchanged
+UPDATE_PROCEDURE = """
+proc anti_aliasing_line_update {canvas line line_aa coordinates state} {
+    if {[llength $coordinates]} {
+        $canvas coords $line_aa $coordinates
+        $canvas coords $line $coordinates
+    }
+    if {[string length $state]} {
+        $canvas itemconfigure $line_aa -state $state
+        $canvas itemconfigure $line -state $state
+    }
+}
+"""
+
+# Tcl interpreters the procedure is defined in. It is defined once per interpreter, not for every instance
+interpreters = set()
+
+
 class AntiAliasingLine:
     """Anti-aliasing line
     class that stores two lines and draws them on top of each other.
-    The bottom line has a lighter color and is wider to smooth out harsh steps"""
+    The bottom line has a lighter color and is wider to smooth out harsh steps.
+    Visibility and the last coordinates are tracked, so unchanged updates cost no call to tcl and
+    changes of both lines are sent with one call to a tcl procedure.
+    On canvases drawing with real anti-aliasing (without TCL_ITEMS), only the line itself is drawn."""
 
-    def __init__(self, canvas, length, color, width, smooth=False, arrow='none'):
+    def __init__(self, canvas, length, color, width, smooth=False, arrow='none', tags=()):
         self.canvas = canvas
         self.line = []
         self.line_aa = []
@@ -36,20 +58,39 @@ class AntiAliasingLine:
             init_coordinates.append(1)
             init_coordinates.append(1)
 
-        self.line_aa = self.canvas.create_line(*init_coordinates, fill=color_aa, width=width+0.5,
-                                               smooth=smooth, arrow=arrow)
+        self.tcl_items = getattr(self.canvas, 'TCL_ITEMS', True)
+        if self.tcl_items:
+            self.line_aa = self.canvas.create_line(*init_coordinates, fill=color_aa, width=width+0.5,
+                                                   smooth=smooth, arrow=arrow, tags=tags)
         self.line = self.canvas.create_line(*init_coordinates, fill=color, width=width,
-                                            smooth=smooth, arrow=arrow)
+                                            smooth=smooth, arrow=arrow, tags=tags)
+
+        self.path = str(self.canvas)
+        self.coordinates = init_coordinates
+        self.visible = True
+        if self.tcl_items and self.canvas.tk not in interpreters:
+            self.canvas.tk.eval(UPDATE_PROCEDURE)
+            interpreters.add(self.canvas.tk)
 
     def update_coordinates(self, coordinates):
         # Set coordinates and show line
-        self.canvas.coords(self.line, *coordinates)
-        self.canvas.coords(self.line_aa, *coordinates)
-        self.canvas.itemconfig(self.line, state='normal')
-        self.canvas.itemconfig(self.line_aa, state='normal')
+        coordinates = list(coordinates)
+        changed = coordinates != self.coordinates
+        if changed or not self.visible:
+            if self.tcl_items:
+                self.canvas.tk.call('anti_aliasing_line_update', self.path, self.line, self.line_aa,
+                                    tuple(coordinates) if changed else (), '' if self.visible else 'normal')
+            else:
+                self.canvas.coords(self.line, *coordinates)
+                self.canvas.itemconfig(self.line, state='normal')
+            self.coordinates = coordinates
+            self.visible = True
 
     def hide(self):
         # Hide line
-        self.canvas.itemconfig(self.line, state='hidden')
-        self.canvas.itemconfig(self.line_aa, state='hidden')
-
+        if self.visible:
+            if self.tcl_items:
+                self.canvas.tk.call('anti_aliasing_line_update', self.path, self.line, self.line_aa, (), 'hidden')
+            else:
+                self.canvas.itemconfig(self.line, state='hidden')
+            self.visible = False
@@ -13,9 +13,20 @@ import interface.modules.gui.gui_colors as color
 class Chart:
     """Chart master
     Class for initializing a chart drawn with tkinter.
-    Contains functions for resizing and calculating pixel locations on canvas based on chart values"""
+    Contains functions for resizing and calculating pixel locations on canvas based on chart values.
+    The affine transformation from chart values to pixel locations is calculated in resize_axes and reused
+    for single values (x_to_pos, y_to_pos) and batches of points (to_screen).
+    Size and visibility of the canvas are tracked with its <Configure>, <Map> and <Unmap> events. A resize marks the
+    chart as dirty and the chart is resized at its next update, so unchanged layouts cost no query to tk.
+    Static content like reference curves only depends on the geometry of the chart. It is computed with static(),
+    which caches it per geometry. The items of the chart are tagged with its name, so a chart sharing its canvas
+    with another one can be hidden and shown again with its static content in place, or released to free them."""
 
     def __init__(self, canvas, name, x_label, y_label, x_left, x_right, y_bottom, y_top, x_grid, y_grid, legend=False):
+        # CONSTANTS
+        self.STATIC_CACHE_SIZE = 20  # Number of geometries with cached static content
+        self.HIDE_OFFSET = 100000  # Distance hidden items are moved outside the canvas
+
         self.L = 90  # Axes distance to frame
         self.R = 30
         self.T = 10
@@ -38,37 +49,128 @@ class Chart:
         self.height = self.canvas.winfo_height()
 
         self.active = True
-
+        self.mapped = bool(self.canvas.winfo_ismapped())
+        self.dirty = True  # Chart needs resizing
+        self.hidden = False
+        self.static_cache = dict()
+        self.bind_canvas()
+
+        # Transformation from chart values to pixel locations, updated at resize
+        self.x_scale = 1
+        self.x_offset = 0
+        self.y_scale = 1
+        self.y_offset = 0
+        self.scale = np.ones(2)
+        self.offset = np.zeros(2)
+        self.screen_min = np.zeros(2)  # Corners of the plot area
+        self.screen_max = np.zeros(2)
+        self.update_transform()
+
+        self.legend = legend
         if legend:
             self.frame_legend = TK.Frame(self.canvas, bd=2, relief='groove')
-            self.frame_legend_id = self.canvas.create_window((100, 100), window=self.frame_legend)
+            self.frame_legend_id = self.canvas.create_window((100, 100), window=self.frame_legend, tags=self.name)
 
         # Initialize lines and labels. Positions will be set at first resize command
         # Axes and labels
-        self.axes = self.canvas.create_rectangle(1, 1, 1, 1, outline=color.COLOR_AXES, width=1)
+        self.axes = self.canvas.create_rectangle(1, 1, 1, 1, outline=color.COLOR_AXES, width=1, tags=self.name)
         self.x_label = self.canvas.create_text((self.width-1, self.height-1), text=x_label, anchor='e',
-                                               font='TkDefaultFont 14 bold', fill=color.COLOR_LABELS)
-        self.y_label = self.canvas.create_text((1, 1), text=y_label, anchor='e',
-                                               font='TkDefaultFont 14 bold', angle=90, fill=color.COLOR_LABELS)
+                                               font='TkDefaultFont 14 bold', fill=color.COLOR_LABELS, tags=self.name)
+        self.y_label = self.canvas.create_text((1, 1), text=y_label, anchor='e', font='TkDefaultFont 14 bold',
+                                               angle=90, fill=color.COLOR_LABELS, tags=self.name)
 
         # Grid and ticks
         self.x_ticks = []
         self.x_tick_labels = []
         for i in range(len(self.x_grid)):
             if not i == 0 or not i == len(self.x_grid) - 1:
-                self.x_ticks.append(self.canvas.create_line(1, 1, 1, 1, fill=color.COLOR_AXES))
+                self.x_ticks.append(self.canvas.create_line(1, 1, 1, 1, fill=color.COLOR_AXES, tags=self.name))
             self.x_tick_labels.append(self.canvas.create_text(1, 1, text=str(self.x_grid[i]), anchor='n',
-                                                              font='TkDefaultFont 10', fill=color.COLOR_TEXT_SMALL))
+                                                              font='TkDefaultFont 10', fill=color.COLOR_TEXT_SMALL,
+                                                              tags=self.name))
 
         self.y_ticks = []
         self.y_tick_labels = []
         for i in range(len(self.y_grid)):
             if not i == 0 or not i == len(self.y_grid) - 1:
-                self.y_ticks.append(self.canvas.create_line(1, 1, 1, 1, fill=color.COLOR_AXES))
+                self.y_ticks.append(self.canvas.create_line(1, 1, 1, 1, fill=color.COLOR_AXES, tags=self.name))
             self.y_tick_labels.append(self.canvas.create_text(1, 1, text=str(self.y_grid[i]), anchor='e',
-                                                              font='TkDefaultFont 10', fill=color.COLOR_TEXT_SMALL))
+                                                              font='TkDefaultFont 10', fill=color.COLOR_TEXT_SMALL,
+                                                              tags=self.name))
+
+    def bind_canvas(self):
+        # A chart replaces the bindings of the previous chart on the same canvas
+        self.canvas.bind('<Configure>', self.on_configure)
+        self.canvas.bind('<Map>', self.on_map)
+        self.canvas.bind('<Unmap>', self.on_unmap)
+
+    def hide(self):
+        # Move the items of the chart outside the canvas. Unlike hiding them, this keeps the state of every item
+        if not self.hidden:
+            self.hidden = True
+            self.active = False
+            self.canvas.move(self.name, self.HIDE_OFFSET, 0)
+
+    def show(self):
+        # Move the items back and take over the canvas. The chart is resized if the canvas changed in the meantime
+        if self.hidden:
+            self.hidden = False
+            self.active = True
+            self.canvas.move(self.name, -self.HIDE_OFFSET, 0)
+            self.bind_canvas()
+            self.mapped = bool(self.canvas.winfo_ismapped())
+            width = self.canvas.winfo_width()
+            height = self.canvas.winfo_height()
+            if not (width == self.width and height == self.height):
+                self.width = width
+                self.height = height
+                self.dirty = True
+
+    def release(self):
+        # Delete the items of the chart. The chart cannot be used afterwards
+        self.active = False
+        self.canvas.delete(self.name)
+        if self.legend:
+            self.frame_legend.destroy()
+        if not self.hidden:
+            # Hidden charts have handed the bindings of the canvas on already
+            for sequence in ('<Configure>', '<Map>', '<Unmap>'):
+                self.canvas.unbind(sequence)
+        self.static_cache.clear()
+
+    def static(self, name, function):
+        # Static content depending only on the geometry of the chart, computed once per geometry
+        key = (name, self.width, self.height, self.x_left, self.x_right, self.y_bottom, self.y_top)
+        if key not in self.static_cache:
+            if len(self.static_cache) >= self.STATIC_CACHE_SIZE:
+                self.static_cache.clear()
+            self.static_cache[key] = function()
+        return self.static_cache[key]
+
+    def on_configure(self, event):
+        if not (event.width == self.width and event.height == self.height):
+            self.width = event.width
+            self.height = event.height
+            self.dirty = True
+
+    def on_map(self, event):
+        self.mapped = True
+
+    def on_unmap(self, event):
+        self.mapped = False
+
+    def update_transform(self):
+        self.x_scale = (self.width - self.L - self.R) / (self.x_right - self.x_left)
+        self.x_offset = self.L - self.x_scale * self.x_left
+        self.y_scale = -(self.height - self.T - self.B) / (self.y_top - self.y_bottom)
+        self.y_offset = self.height - self.B - self.y_scale * self.y_bottom
+        self.scale = np.array([self.x_scale, self.y_scale])
+        self.offset = np.array([self.x_offset, self.y_offset])
+        self.screen_min = np.array([self.L, self.T])
+        self.screen_max = np.array([self.width - self.R, self.height - self.B])
 
     def resize_axes(self):
+        self.update_transform()
 
         # Axes and labels
         self.canvas.coords(self.axes, self.L, self.T, self.width - self.R, self.height - self.B)
@@ -102,28 +204,25 @@ class Chart:
                 self.canvas.itemconfig(self.y_tick_labels[i], state='hidden')
 
     def x_to_pos(self, x):
-        x_pos = self.L + (self.width - self.L - self.R) / (self.x_right - self.x_left) * (x - self.x_left)
-
-        if isinstance(x, np.ndarray):
-            x_pos[x_pos < self.L - 1] = -1
-            x_pos[x_pos > self.width-self.R] = -1
-            return x_pos
-        else:
-            if x_pos < self.L - 1 or x_pos > self.width-self.R:
-                return -1
-            else:
-                return x_pos
+        x_pos = self.x_offset + self.x_scale * x
+        if x_pos < self.L - 1 or x_pos > self.width - self.R:
+            return -1
+        return x_pos
 
     def y_to_pos(self, y):
-        y_pos = self.height - self.B - (self.height - self.T - self.B) \
-                / (self.y_top - self.y_bottom) * (y - self.y_bottom)
-
-        if isinstance(y, np.ndarray):
-            y_pos[y_pos < self.T - 1] = -1
-            y_pos[y_pos > self.height-self.B] = -1
-            return y_pos
-        else:
-            if y_pos < self.T - 1 or y_pos > self.height-self.B:
-                return -1
-            else:
-                return y_pos
+        y_pos = self.y_offset + self.y_scale * y
+        if y_pos < self.T - 1 or y_pos > self.height - self.B:
+            return -1
+        return y_pos
+
+    def to_screen(self, points, clip=False):
+        # Pixel locations of an array of points (x, y). Points outside the plot area are moved to its border if clipped
+        positions = np.multiply(points, self.scale)
+        positions += self.offset
+        if clip:
+            np.clip(positions, self.screen_min, self.screen_max, out=positions)
+        return positions
+
+    def inside(self, positions):
+        # Mask of the pixel locations inside the plot area
+        return np.all((positions >= self.screen_min - 1) & (positions <= self.screen_max), axis=-1)
@@ -5,50 +5,62 @@ The MicroWind software is licensed under GPLv3
 Authors: Felix Prigge
 """
 
+import numpy as np
 from interface.modules.gui.charts.chart import Chart
-from interface.modules.gui.charts.data_point import DataPoint
-import interface.modules.gui.gui_colors as color
+from interface.modules.gui.charts.data_point import DataPoints, DotLayer
 
 class Chart1(Chart):
     """Chart1 Superclass
-    Chart Superclass with functionality to take data points"""
+    Chart Superclass with functionality to take data points.
+    The dots are kept in a DotLayer. Pass the layer of the previous chart to keep the dots when changing the
+    chart type, they are repositioned in one pass at resize."""
 
-    def __init__(self, canvas, **kwargs):
+    def __init__(self, canvas, dots=None, **kwargs):
         super().__init__(canvas, **kwargs)
 
         self.DOT_SIZE = 7
+        self.DOT_COUNT = 10
         self.LINE_WIDTH = 2
 
         # Dots
-        self.i_dot = 0
-        self.continuous_dots = []
-        self.save_dots = []
+        self.dots = dots if dots is not None else DotLayer(self.canvas, self.DOT_SIZE, self.DOT_COUNT)
+
+    def dot_positions(self, values):
+        # Pixel locations of dots. Dots outside the plot area or without values are hidden
+        positions = self.to_screen(values)
+        outside = ~self.inside(positions) | ~np.all(np.isfinite(positions), axis=1)
+        positions[outside] = self.dots.HIDDEN
+        return positions
+
+    def move_dot(self, item, values):
+        # Move a single dot to the values of a point
+        [i_x, i_y] = DataPoints.COLUMNS[self.name]
+        x = self.x_to_pos(values[i_x])
+        y = self.y_to_pos(values[i_y])
+        if x == -1 or y == -1:
+            x = y = self.dots.HIDDEN
+        self.canvas.coords(item, x - self.DOT_SIZE, y - self.DOT_SIZE, x + self.DOT_SIZE, y + self.DOT_SIZE)
 
     def update_dots(self, data):
-        if len(self.continuous_dots) < 10:
-            self.continuous_dots.append(DataPoint(data, color.GRAY))
-            self.continuous_dots[-1].draw(self)
-        else:
-            self.continuous_dots[self.i_dot].clear()
-            self.continuous_dots[self.i_dot] = DataPoint(data, color.GRAY)
-            self.continuous_dots[self.i_dot].draw(self)
-            self.i_dot += 1
-            if self.i_dot == 10:
-                self.i_dot = 0
+        # Move the oldest dot of the pool to the new sample
+        values = DataPoints.sample_values(data)
+        self.move_dot(self.dots.add_continuous(values), values)
 
     def take_save_dot(self, data, color):
-        self.save_dots.append(DataPoint(data, color))
-        self.save_dots[-1].draw(self)
+        values = DataPoints.sample_values(data)
+        self.move_dot(self.dots.add_saved(values, color), values)
 
-    def redraw_dots(self):
-        for d in self.save_dots:
-            d.draw(self)
+    def clear_save_dots(self):
+        self.dots.clear_saved()
 
     def resize_dots(self):
-        for d in self.continuous_dots:
-            d.update_coordinates()
-
-        for d in self.save_dots:
-            d.update_coordinates()
-
+        # Dots are drawn on top of the lines of the chart
+        self.canvas.tag_raise('dot')
+        self.dots.move(self.dots.continuous_items, self.dot_positions(self.dots.continuous.chart_values(self.name)))
+        self.dots.move(self.dots.saved_items, self.dot_positions(self.dots.saved.chart_values(self.name)))
 
+    def show(self):
+        # The shared dots were positioned by the other chart type
+        super().show()
+        if not self.dirty:
+            self.resize_dots()
@@ -15,8 +15,9 @@ class Chart1a(Chart1):
     """Chart1a Power curve
     Chart to display power vs wind speed in the bottom left area"""
 
-    def __init__(self, canvas):
+    def __init__(self, canvas, dots=None):
         super().__init__(canvas,
+                         dots=dots,
                          name='power_v1',
                          x_label="Wind speed (m/s)",
                          y_label="Turbine power (mW)",
@@ -28,17 +29,15 @@ class Chart1a(Chart1):
                          y_grid=[0, 20, 40, 60, 80, 100, 120, 140])
 
         # Power curve
-        self.pc_cin = AntiAliasingLine(self.canvas, length=1, color=color.GRAY, width=self.LINE_WIDTH)
-        self.pc_opt = AntiAliasingLine(self.canvas, length=4, color=color.GRAY, width=self.LINE_WIDTH, smooth=True)
-        self.pc_max = AntiAliasingLine(self.canvas, length=2, color=color.GRAY, width=self.LINE_WIDTH)
+        self.pc_cin = AntiAliasingLine(self.canvas, length=1, color=color.GRAY, width=self.LINE_WIDTH, tags=self.name)
+        self.pc_opt = AntiAliasingLine(self.canvas, length=4, color=color.GRAY, width=self.LINE_WIDTH, smooth=True,
+                                       tags=self.name)
+        self.pc_max = AntiAliasingLine(self.canvas, length=2, color=color.GRAY, width=self.LINE_WIDTH, tags=self.name)
 
     def update(self, data, force_resize=False):
         # Check if chart needs resizing
-        if not self.width == self.canvas.winfo_width() \
-                or not self.height == self.canvas.winfo_height()\
-                or force_resize:
-            self.width = self.canvas.winfo_width()
-            self.height = self.canvas.winfo_height()
+        if self.dirty or force_resize:
+            self.dirty = False
             self.resize_axes()
             self.resize_dots()
             self.resize_specific(data)
@@ -46,17 +45,19 @@ class Chart1a(Chart1):
         self.update_dots(data)
 
     def resize_specific(self, data):
-        # Power curve
+        # Power curve, computed once per geometry
+        positions = self.static('power_curve', lambda: self.power_curve(data))
+        self.pc_cin.update_coordinates(positions[0:4])
+        self.pc_opt.update_coordinates(positions[2:12])
+        self.pc_max.update_coordinates(positions[12:18])
+
+    def power_curve(self, data):
         power_factor = data.POWER_RATED/data.WIND_RATED**3
         x = np.linspace(data.WIND_IN, data.WIND_RATED, 5)
         y = power_factor * x**3
-        self.pc_cin.update_coordinates((self.x_to_pos(data.WIND_IN), self.y_to_pos(0),
-                                        self.x_to_pos(data.WIND_IN), self.y_to_pos(y[0])))
-        self.pc_opt.update_coordinates((self.x_to_pos(x[0]), self.y_to_pos(y[0]),
-                                        self.x_to_pos(x[1]), self.y_to_pos(y[1]),
-                                        self.x_to_pos(x[2]), self.y_to_pos(y[2]),
-                                        self.x_to_pos(x[3]), self.y_to_pos(y[3]),
-                                        self.x_to_pos(x[4]), self.y_to_pos(y[4])))
-        self.pc_max.update_coordinates((self.x_to_pos(data.WIND_RATED), self.y_to_pos(data.POWER_RATED),
-                                        self.x_to_pos(data.WIND_OUT_1), self.y_to_pos(data.POWER_RATED),
-                                        self.x_to_pos(data.WIND_OUT_2), self.y_to_pos(0)))
+        points = np.array([[data.WIND_IN, 0],
+                           *np.column_stack((x, y)),
+                           [data.WIND_RATED, data.POWER_RATED],
+                           [data.WIND_OUT_1, data.POWER_RATED],
+                           [data.WIND_OUT_2, 0]])
+        return self.to_screen(points, clip=True).ravel().tolist()
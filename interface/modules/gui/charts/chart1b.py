@@ -15,8 +15,9 @@ class Chart1b(Chart1):
     """Chart1b c_p lambda
     Chart to display power coefiicient vs tip speed ratio in the bottom left area"""
 
-    def __init__(self, canvas):
+    def __init__(self, canvas, dots=None):
         super().__init__(canvas,
+                         dots=dots,
                          name='cp_tsr_0_deg',
                          x_label="Tip speed ratio",
                          y_label="Power coefficient",
@@ -35,22 +36,22 @@ class Chart1b(Chart1):
         self.cp_tsr_5_deg_coordinates[:, 1] *= self.CP_CORRECTION_FACTOR
 
         self.cp_tsr_0_deg = AntiAliasingLine(self.canvas, length=len(self.cp_tsr_0_deg_coordinates[:, 0]),
-                                             color=color.GRAY, width=self.LINE_WIDTH, smooth=True)
+                                             color=color.GRAY, width=self.LINE_WIDTH, smooth=True, tags=self.name)
         self.cp_tsr_5_deg = AntiAliasingLine(self.canvas, length=len(self.cp_tsr_5_deg_coordinates[:, 0]),
-                                             color=color.LIGHT_GRAY, width=self.LINE_WIDTH, smooth=True)
+                                             color=color.LIGHT_GRAY, width=self.LINE_WIDTH, smooth=True,
+                                             tags=self.name)
 
         self.beta_label_0_deg = self.canvas.create_text((1, 1), text='beta = 0°', anchor='w',
-                                                        font='TkDefaultFont 10 bold', fill=color.GRAY)
+                                                        font='TkDefaultFont 10 bold', fill=color.GRAY,
+                                                        tags=self.name)
         self.beta_label_5_deg = self.canvas.create_text((1, 1), text='beta = 5°', anchor='e',
-                                                        font='TkDefaultFont 10 bold', fill=color.LIGHT_GRAY)
+                                                        font='TkDefaultFont 10 bold', fill=color.LIGHT_GRAY,
+                                                        tags=self.name)
 
     def update(self, data, force_resize=False):
         # Check if chart needs resizing
-        if not self.width == self.canvas.winfo_width() \
-                or not self.height == self.canvas.winfo_height()\
-                or force_resize:
-            self.width = self.canvas.winfo_width()
-            self.height = self.canvas.winfo_height()
+        if self.dirty or force_resize:
+            self.dirty = False
             self.resize_axes()
             self.resize_dots()
             self.resize_specific()
@@ -58,15 +59,11 @@ class Chart1b(Chart1):
         self.update_dots(data)
 
     def resize_specific(self):
-        x_pos = self.x_to_pos(self.cp_tsr_0_deg_coordinates[:, 0])
-        y_pos = self.y_to_pos(self.cp_tsr_0_deg_coordinates[:, 1])
-        t = tuple(np.stack((x_pos, y_pos)).flatten('F'))
-        self.cp_tsr_0_deg.update_coordinates(t)
-        self.canvas.coords(self.beta_label_0_deg, x_pos[0]+10, y_pos[0])
+        # Curves, computed once per geometry
+        positions = self.static('cp_tsr_0_deg', lambda: self.to_screen(self.cp_tsr_0_deg_coordinates, clip=True))
+        self.cp_tsr_0_deg.update_coordinates(positions.ravel().tolist())
+        self.canvas.coords(self.beta_label_0_deg, positions[0, 0]+10, positions[0, 1])
 
-        x_pos = self.x_to_pos(self.cp_tsr_5_deg_coordinates[:, 0])
-        y_pos = self.y_to_pos(self.cp_tsr_5_deg_coordinates[:, 1])
-        t = tuple(np.stack((x_pos, y_pos)).flatten('F'))
-        self.cp_tsr_5_deg.update_coordinates(t)
-        self.cp_tsr_5_deg.update_coordinates(t)
-        self.canvas.coords(self.beta_label_5_deg, x_pos[0]+10, y_pos[0]-20)
+        positions = self.static('cp_tsr_5_deg', lambda: self.to_screen(self.cp_tsr_5_deg_coordinates, clip=True))
+        self.cp_tsr_5_deg.update_coordinates(positions.ravel().tolist())
+        self.canvas.coords(self.beta_label_5_deg, positions[0, 0]+10, positions[0, 1]-20)
@@ -8,7 +8,7 @@ Authors: Felix Prigge
 import tkinter as TK
 import tkinter.ttk as ttk
 import numpy as np
-import time
+from interface.modules.clock import Clock
 from interface.modules.gui.charts.chart import Chart
 from interface.modules.gui.charts.anti_aliasing_line import AntiAliasingLine
 import interface.modules.gui.gui_colors as color
@@ -16,53 +16,67 @@ import interface.modules.gui.gui_colors as color
 
 class Chart2(Chart):
     """Chart2 time series of measurements
-    Chart to display the history of various measurements"""
+    Chart to display the history of various measurements over the last window seconds.
+    Every sample is written into a preallocated ring buffer of history_length samples. The buffer holds every
+    sample twice, at index i and i + history_length, so the history is always available as one contiguous view
+    from the oldest to the newest sample without copying.
+    If the window holds more samples than pixels, the lines are drawn from min/max buckets instead: every
+    bucket covers one pixel column and contributes its minimum and maximum in the order of their occurrence,
+    so the number of coordinates is bounded by the width of the chart. Buckets are updated with every new
+    sample and only rebuilt from the history on resize."""
 
-    def __init__(self, canvas):
+    def __init__(self, canvas, clock=None, window=6, history_length=1200):
         super().__init__(canvas,
                          name='time_series',
                          x_label="Time (s)",
                          y_label="Normalized values",
                          x_left=0,
-                         x_right=6,
+                         x_right=window,
                          y_bottom=0,
                          y_top=3,
-                         x_grid=[0, 1, 2, 3, 4, 5, 6],
+                         x_grid=list(range(0, int(window) + 1, max(int(window) // 6, 1))),
                          y_grid=[0, 0.5, 1, 1.5, 2, 2.5, 3],
                          legend=True)
 
         self.LINE_WIDTH = 2
-        self.LINE_SEGMENTS = 50
-
-        self.last_time = time.time()
-
-        self.power_line = []
-        self.rotation_line = []
-        self.wind_line = []
-        self.thrust_line = []
-        self.torque_line = []
-        self.anemometer_line = []
-
-        self.power_line = AntiAliasingLine(self.canvas, length=self.LINE_SEGMENTS,
-                                           color=color.BLUE, width=self.LINE_WIDTH)
-        self.rotation_line = AntiAliasingLine(self.canvas, length=self.LINE_SEGMENTS,
-                                              color=color.GREEN, width=self.LINE_WIDTH)
-        self.wind_line = AntiAliasingLine(self.canvas, length=self.LINE_SEGMENTS,
-                                          color=color.RED, width=self.LINE_WIDTH)
-        self.thrust_line = AntiAliasingLine(self.canvas, length=self.LINE_SEGMENTS,
-                                            color=color.PURPLE, width=self.LINE_WIDTH)
-        self.torque_line = AntiAliasingLine(self.canvas, length=self.LINE_SEGMENTS,
-                                            color=color.ORANGE, width=self.LINE_WIDTH)
-        self.anemometer_line = AntiAliasingLine(self.canvas, length=self.LINE_SEGMENTS,
-                                                color=color.AQUA, width=self.LINE_WIDTH)
-
-        self.x_values = np.zeros(self.LINE_SEGMENTS+1)
-        self.power_values = np.zeros(self.LINE_SEGMENTS+1)
-        self.rotation_values = np.zeros(self.LINE_SEGMENTS+1)
-        self.wind_values = np.zeros(self.LINE_SEGMENTS+1)
-        self.thrust_values = np.zeros(self.LINE_SEGMENTS+1)
-        self.torque_values = np.zeros(self.LINE_SEGMENTS+1)
-        self.anemometer_values = np.zeros(self.LINE_SEGMENTS+1)
+        self.HISTORY_LENGTH = int(history_length)  # Loop rates given with --rate are floats
+
+        self.clock = clock if clock is not None else Clock()
+
+        self.power_line = AntiAliasingLine(self.canvas, length=1, color=color.BLUE, width=self.LINE_WIDTH,
+                                           tags=self.name)
+        self.rotation_line = AntiAliasingLine(self.canvas, length=1, color=color.GREEN, width=self.LINE_WIDTH,
+                                              tags=self.name)
+        self.wind_line = AntiAliasingLine(self.canvas, length=1, color=color.RED, width=self.LINE_WIDTH, tags=self.name)
+        self.thrust_line = AntiAliasingLine(self.canvas, length=1, color=color.PURPLE, width=self.LINE_WIDTH,
+                                            tags=self.name)
+        self.torque_line = AntiAliasingLine(self.canvas, length=1, color=color.ORANGE, width=self.LINE_WIDTH,
+                                            tags=self.name)
+        self.anemometer_line = AntiAliasingLine(self.canvas, length=1, color=color.AQUA, width=self.LINE_WIDTH,
+                                                tags=self.name)
+
+        # Ring buffer. Rows: time, power, rotation, wind, thrust, torque, anemometer. Empty slots lie at -inf
+        self.history = np.zeros((7, 2 * self.HISTORY_LENGTH))
+        self.history[0] = -np.inf
+        self.i_history = self.HISTORY_LENGTH - 1
+        self.time_last = None
+        # Preallocated positions
+        self.x_positions = np.zeros(self.HISTORY_LENGTH)
+        self.coordinates = np.zeros(2 * self.HISTORY_LENGTH)
+
+        # Min/max buckets of one pixel column, also kept twice in a ring. Sized at resize
+        self.bucket_duration = None
+        self.bucket_count = 0
+        self.bucket_index = None
+        self.i_bucket = 0
+        self.bucket_time = np.zeros(0)
+        self.bucket_min = np.zeros((6, 0))
+        self.bucket_max = np.zeros((6, 0))
+        self.bucket_time_min = np.zeros((6, 0))
+        self.bucket_time_max = np.zeros((6, 0))
+        self.bucket_first = np.zeros(0, dtype=bool)
+        self.bucket_x = np.zeros(0)
+        self.bucket_y = np.zeros(0)
 
         self.show_power = TK.BooleanVar(value=True)
         self.show_rotation = TK.BooleanVar(value=True)
@@ -91,84 +105,166 @@ class Chart2(Chart):
 
     def update(self, data):
         # Check if chart needs resizing
-        if not self.width == self.canvas.winfo_width() or not self.height == self.canvas.winfo_height():
-            self.width = self.canvas.winfo_width()
-            self.height = self.canvas.winfo_height()
+        if self.dirty:
+            self.dirty = False
             self.resize_axes()
             self.resize_specific()
         self.update_lines(data)
 
     def resize_specific(self):
-        w_canvas = self.canvas.winfo_width()
+        w_canvas = self.width
         w_legend = self.frame_legend.winfo_width()
         h_legend = self.frame_legend.winfo_height()
         self.canvas.coords(self.frame_legend_id, w_canvas-w_legend/2-self.R-10, h_legend/2+self.T+10)
+        self.build_buckets()
 
-    def update_lines(self, data):
-        self.x_values = self.x_values + time.time() - self.last_time
-        self.last_time = time.time()
-        self.x_values = np.roll(self.x_values, 1)
-        self.x_values[0] = 0
-
-        self.power_values = np.roll(self.power_values, 1)
-        self.rotation_values = np.roll(self.rotation_values, 1)
-        self.wind_values = np.roll(self.wind_values, 1)
-        self.thrust_values = np.roll(self.thrust_values, 1)
-        self.torque_values = np.roll(self.torque_values, 1)
-        self.anemometer_values = np.roll(self.anemometer_values, 1)
-
-        self.x_values[self.x_values > self.x_right] = self.x_right
-
-        self.power_values[0] = self.limit_y(data.power_turb / data.POWER_RATED)
-        self.rotation_values[0] = self.limit_y(data.rot_turb / data.ROT_RATED)
-        self.wind_values[0] = self.limit_y(data.v_1 / data.WIND_RATED)
-        self.thrust_values[0] = self.limit_y(data.thrust_force / data.THRUST_RATED)
-        self.torque_values[0] = self.limit_y(data.torque / data.TORQUE_RATED)
-        self.anemometer_values[0] = self.limit_y(data.v_anem / data.WIND_RATED)
-
-        x_pos = self.x_to_pos(self.x_values)
-        power_pos = self.y_to_pos(self.power_values)
-        rotation_pos = self.y_to_pos(self.rotation_values)
-        wind_pos = self.y_to_pos(self.wind_values)
-        thrust_pos = self.y_to_pos(self.thrust_values)
-        torque_pos = self.y_to_pos(self.torque_values)
-        anemometer_pos = self.y_to_pos(self.anemometer_values)
-
-        if self.show_power.get():
-            t = tuple(np.stack((x_pos, power_pos)).flatten('F'))
-            self.power_line.update_coordinates(t)
-        else:
-            self.power_line.hide()
+    def append(self, data):
+        # Write a sample into the ring buffer. Samples already in the buffer are skipped
+        if data.time == self.time_last:
+            return
+        self.time_last = data.time
+        self.i_history = (self.i_history + 1) % self.HISTORY_LENGTH
+        values = (data.time,
+                  self.limit_y(data.power_turb / data.POWER_RATED),
+                  self.limit_y(data.rot_turb / data.ROT_RATED),
+                  self.limit_y(data.v_1 / data.WIND_RATED),
+                  self.limit_y(data.thrust_force / data.THRUST_RATED),
+                  self.limit_y(data.torque / data.TORQUE_RATED),
+                  self.limit_y(data.v_anem / data.WIND_RATED))
+        self.history[:, self.i_history] = values
+        self.history[:, self.i_history + self.HISTORY_LENGTH] = values
+        if self.bucket_duration is not None:
+            self.aggregate(data.time, self.history[1:, self.i_history])
 
-        if self.show_rotation.get():
-            t = tuple(np.stack((x_pos, rotation_pos)).flatten('F'))
-            self.rotation_line.update_coordinates(t)
-        else:
-            self.rotation_line.hide()
+    def view(self):
+        # History from the oldest to the newest sample
+        return self.history[:, self.i_history + 1:self.i_history + 1 + self.HISTORY_LENGTH]
 
-        if self.show_wind.get():
-            t = tuple(np.stack((x_pos, wind_pos)).flatten('F'))
-            self.wind_line.update_coordinates(t)
-        else:
-            self.wind_line.hide()
+    def build_buckets(self):
+        # One bucket per pixel column of the plot area and two spare ones for the partly visible edges
+        columns = max(int(self.width - self.L - self.R), 1)
+        self.bucket_duration = (self.x_right - self.x_left) / columns
+        self.bucket_count = columns + 2
+        self.bucket_index = None
+        self.i_bucket = self.bucket_count - 1
+        self.bucket_time = np.full(2 * self.bucket_count, -np.inf)
+        self.bucket_min = np.zeros((6, 2 * self.bucket_count))
+        self.bucket_max = np.zeros((6, 2 * self.bucket_count))
+        self.bucket_time_min = np.zeros((6, 2 * self.bucket_count))
+        self.bucket_time_max = np.zeros((6, 2 * self.bucket_count))
+        self.bucket_first = np.zeros(self.bucket_count, dtype=bool)
+        self.bucket_x = np.zeros(self.bucket_count)
+        self.bucket_y = np.zeros(self.bucket_count)
+        if len(self.coordinates) < 4 * self.bucket_count:
+            self.coordinates = np.zeros(4 * self.bucket_count)
 
-        if self.show_thrust.get():
-            t = tuple(np.stack((x_pos, thrust_pos)).flatten('F'))
-            self.thrust_line.update_coordinates(t)
-        else:
-            self.thrust_line.hide()
+        # Fill the buckets from the history
+        history = self.view()
+        for i in np.flatnonzero(np.isfinite(history[0])):
+            self.aggregate(history[0, i], history[1:, i])
 
-        if self.show_torque.get():
-            t = tuple(np.stack((x_pos, torque_pos)).flatten('F'))
-            self.torque_line.update_coordinates(t)
+    def aggregate(self, t, values):
+        # Add a sample to the newest bucket or start a new one
+        index = int(t // self.bucket_duration)
+        j = self.i_bucket
+        if index == self.bucket_index:
+            np.copyto(self.bucket_time_min[:, j], t, where=values < self.bucket_min[:, j])
+            np.copyto(self.bucket_time_max[:, j], t, where=values > self.bucket_max[:, j])
+            np.minimum(self.bucket_min[:, j], values, out=self.bucket_min[:, j])
+            np.maximum(self.bucket_max[:, j], values, out=self.bucket_max[:, j])
         else:
-            self.torque_line.hide()
+            self.bucket_index = index
+            j = self.i_bucket = (self.i_bucket + 1) % self.bucket_count
+            self.bucket_time[j] = self.bucket_time[j + self.bucket_count] = index * self.bucket_duration
+            self.bucket_min[:, j] = values
+            self.bucket_max[:, j] = values
+            self.bucket_time_min[:, j] = t
+            self.bucket_time_max[:, j] = t
+        k = j + self.bucket_count
+        self.bucket_min[:, k] = self.bucket_min[:, j]
+        self.bucket_max[:, k] = self.bucket_max[:, j]
+        self.bucket_time_min[:, k] = self.bucket_time_min[:, j]
+        self.bucket_time_max[:, k] = self.bucket_time_max[:, j]
 
-        if self.show_anemometer.get():
-            t = tuple(np.stack((x_pos, anemometer_pos)).flatten('F'))
-            self.anemometer_line.update_coordinates(t)
-        else:
-            self.anemometer_line.hide()
+    def time_to_pos(self, t, now, out):
+        # Age of the samples to x position, in place. Samples older than the window are drawn at its edge
+        np.subtract(now, t, out=out)
+        np.minimum(out, self.x_right, out=out)
+        np.multiply(out, self.x_scale, out=out)
+        np.add(out, self.x_offset, out=out)
+
+    def value_to_pos(self, value, out):
+        # Normalized value to y position, in place
+        np.multiply(value, self.y_scale, out=out)
+        np.add(out, self.y_offset, out=out)
+
+    def update_lines(self, data):
+        self.append(data)
+        history = self.view()
+
+        # Samples inside the window and the last one before, which is drawn at the edge of the window
+        now = self.clock.time()
+        start = np.searchsorted(history[0], now - self.x_right)
+        if start > 0 and np.isfinite(history[0, start - 1]):
+            start -= 1
+        n = self.HISTORY_LENGTH - start
+        lines = ((self.power_line, self.show_power), (self.rotation_line, self.show_rotation),
+                 (self.wind_line, self.show_wind), (self.thrust_line, self.show_thrust),
+                 (self.torque_line, self.show_torque), (self.anemometer_line, self.show_anemometer))
+        if n < 2:
+            for line, show in lines:
+                line.hide()
+            return
+        if self.bucket_duration is not None and n > 2 * self.bucket_count:
+            self.update_lines_decimated(lines, now)
+            return
+
+        x = self.x_positions[:n]
+        self.time_to_pos(history[0, start:], now, x)
+        self.coordinates[0:2 * n:2] = x
+        y = self.coordinates[1:2 * n:2]
+        for row, (line, show) in enumerate(lines, 1):
+            if show.get():
+                self.value_to_pos(history[row, start:], y)
+                line.update_coordinates(self.coordinates[:2 * n].tolist())
+            else:
+                line.hide()
+
+    def update_lines_decimated(self, lines, now):
+        # Buckets inside the window and the last one before
+        m = self.bucket_count
+        bucket_time = self.bucket_time[self.i_bucket + 1:self.i_bucket + 1 + m]
+        start = np.searchsorted(bucket_time, now - self.x_right - self.bucket_duration)
+        if start > 0 and np.isfinite(bucket_time[start - 1]):
+            start -= 1
+        n = m - start
+        view = slice(self.i_bucket + 1 + start, self.i_bucket + 1 + m)
+        first = self.bucket_first[:n]
+        x = self.bucket_x[:n]
+        y = self.bucket_y[:n]
+        for row, (line, show) in enumerate(lines):
+            if not show.get():
+                line.hide()
+                continue
+            time_min = self.bucket_time_min[row, view]
+            time_max = self.bucket_time_max[row, view]
+            # Every bucket gives two points, the earlier of minimum and maximum first
+            np.less_equal(time_min, time_max, out=first)
+            np.minimum(time_min, time_max, out=x)
+            self.time_to_pos(x, now, x)
+            self.coordinates[0:4 * n:4] = x
+            np.maximum(time_min, time_max, out=x)
+            self.time_to_pos(x, now, x)
+            self.coordinates[2:4 * n:4] = x
+            np.copyto(y, self.bucket_max[row, view])
+            np.copyto(y, self.bucket_min[row, view], where=first)
+            self.value_to_pos(y, y)
+            self.coordinates[1:4 * n:4] = y
+            np.copyto(y, self.bucket_min[row, view])
+            np.copyto(y, self.bucket_max[row, view], where=first)
+            self.value_to_pos(y, y)
+            self.coordinates[3:4 * n:4] = y
+            line.update_coordinates(self.coordinates[:4 * n].tolist())
 
     def limit_y(self, value):
         if value > self.y_top:
@@ -35,28 +35,27 @@ class Chart3(Chart):
 
         self.lambda_lines = []
         for i in range(10):
-            self.lambda_lines.append(AntiAliasingLine(self.canvas, length=1, color=color.GRAY, width=1))
+            self.lambda_lines.append(AntiAliasingLine(self.canvas, length=1, color=color.GRAY, width=1, tags=self.name))
 
         labels = ["tip speed ratio = 0", "1", "2", "3", "4"]
         self.lambda_labels = []
         for i in range(len(labels)):
             self.lambda_labels.append(self.canvas.create_text((1, 1), text=labels[i], anchor='e',
-                                      font='TkDefaultFont 10 bold', fill=color.COLOR_LABELS))
+                                      font='TkDefaultFont 10 bold', fill=color.COLOR_LABELS, tags=self.name))
 
         self.profile_coordinates = np.loadtxt('data/profile.txt', skiprows=0, dtype=float)
         self.profile_coordinates[:, 0] = -(self.profile_coordinates[:, 0]-0.25)
         self.profile_coordinates[:, 1] = -(self.profile_coordinates[:, 1]-0.05)
         self.profile_coordinates = self.profile_coordinates * 6
         self.profile = AntiAliasingLine(self.canvas, length=len(self.profile_coordinates[:, 0]),
-                                        color=color.BLUE, width=2)
+                                        color=color.BLUE, width=2, tags=self.name)
 
-        self.inflow = AntiAliasingLine(self.canvas, length=1, color=color.RED, width=2, arrow='last')
+        self.inflow = AntiAliasingLine(self.canvas, length=1, color=color.RED, width=2, arrow='last', tags=self.name)
 
     def update(self, data):
         # Check if chart needs resizing
-        if not self.width == self.canvas.winfo_width() or not self.height == self.canvas.winfo_height():
-            self.width = self.canvas.winfo_width()
-            self.height = self.canvas.winfo_height()
+        if self.dirty:
+            self.dirty = False
             self.x_right = self.X_RIGHT_MAX
             y_spacing = self.height / abs(self.y_top - self.y_bottom)
             self.x_left = self.width / y_spacing + self.x_right
@@ -71,22 +70,31 @@ class Chart3(Chart):
         self.draw_inflow(data)
 
     def resize_specific(self, data):
-        # Lambda lines
-        for i in range(10):
-            # calc x
-            x = self.y_bottom * i
-            y = self.y_bottom
-            if x > self.x_left:
-                x = self.x_left
-                y = self.x_left / i
-
-            self.lambda_lines[i].update_coordinates((self.x_to_pos(x), self.y_to_pos(y),
-                                                     self.x_to_pos(0), self.y_to_pos(0)))
-            if i < len(self.lambda_labels):
-                self.canvas.coords(self.lambda_labels[i], self.x_to_pos(x+0.2), self.y_to_pos(self.y_bottom-0.4))
+        # Lambda lines and labels, computed once per geometry
+        [line_positions, label_positions] = self.static('lambda_lines', self.lambda_positions)
+        for line, position in zip(self.lambda_lines, line_positions):
+            line.update_coordinates(position)
+        for label, position in zip(self.lambda_labels, label_positions):
+            self.canvas.coords(label, *position)
 
         self.draw_profile(data)
 
+    def lambda_positions(self):
+        # Lambda lines from the origin to the border of the chart
+        tsr = np.arange(len(self.lambda_lines))
+        tips = np.zeros((len(tsr), 2))
+        tips[:, 0] = self.y_bottom * tsr
+        tips[:, 1] = self.y_bottom
+        outside = tips[:, 0] > self.x_left
+        tips[outside, 0] = self.x_left
+        tips[outside, 1] = self.x_left / tsr[outside]
+        origin = self.to_screen((0, 0)).tolist()
+        line_positions = [position + origin for position in self.to_screen(tips, clip=True).tolist()]
+
+        labels = np.column_stack((tips[:len(self.lambda_labels), 0] + 0.2,
+                                  np.full(len(self.lambda_labels), self.y_bottom - 0.4)))
+        return line_positions, self.to_screen(labels).tolist()
+
     def draw_profile(self, data):
         theta = -np.deg2rad(data.beta_set)
         rot = np.asarray([[cos(theta), -sin(theta)], [sin(theta), cos(theta)]])
@@ -94,30 +102,21 @@ class Chart3(Chart):
         if not self.x_right == self.X_RIGHT_MAX:
             profile_rotated *= 0.5
         [profile_rotated[:, 0], profile_rotated[:, 1]] = self.limit(profile_rotated[:, 0], profile_rotated[:, 1])
-        x_pos = self.x_to_pos(profile_rotated[:, 0])
-        y_pos = self.y_to_pos(profile_rotated[:, 1])
 
-        t = tuple(np.stack((x_pos, y_pos)).flatten('F'))
-
-        self.profile.update_coordinates(t)
+        self.profile.update_coordinates(self.to_screen(profile_rotated, clip=True).ravel().tolist())
 
     def draw_inflow(self, data):
-        x_pos = 0
-        y_pos = 0
-        x_pos_cent = self.x_to_pos(0)
-        y_pos_cent = self.y_to_pos(0)
-
+        point = (0, 0)
         if data.tip_speed <= self.x_left and data.v_1 <= self.y_bottom:
-            x_pos = self.x_to_pos(data.tip_speed)
-            y_pos = self.y_to_pos(data.v_1)
+            point = (data.tip_speed, data.v_1)
         elif data.tip_speed > self.x_left:
-            x_pos = self.x_to_pos(self.x_left)
-            y_pos = self.y_to_pos(data.v_1 * self.x_left / data.tip_speed)
+            point = (self.x_left, data.v_1 * self.x_left / data.tip_speed)
         elif data.v_1 > self.y_bottom:
-            x_pos = self.x_to_pos(data.tip_speed * self.y_bottom / data.v_1)
-            y_pos = self.y_to_pos(self.y_bottom)
+            point = (data.tip_speed * self.y_bottom / data.v_1, self.y_bottom)
 
-        self.inflow.update_coordinates((x_pos, y_pos, x_pos_cent, y_pos_cent))
+        self.inflow.update_coordinates((self.x_offset + self.x_scale * point[0],
+                                        self.y_offset + self.y_scale * point[1],
+                                        self.x_offset, self.y_offset))
 
     def limit(self, x_values, y_values):
         left_x = self.x_left > x_values
@@ -16,7 +16,10 @@ import interface.modules.gui.gui_colors as color
 
 class Chart4(Chart):
     """Chart4 Aerodynamics
-    Chart to display inflow and resulting forces at the blade tip"""
+    Chart to display inflow and resulting forces at the blade tip.
+    The profile is drawn as one polyline. Points outside the plot area are moved onto the nearest point inside,
+    like the profile of Chart3, so no segments are drawn along the border. Its screen coordinates are cached per
+    pitch angle, the cache is cleared when the chart is resized."""
 
     def __init__(self, canvas):
         super().__init__(canvas,
@@ -34,25 +37,34 @@ class Chart4(Chart):
         self.LINE_WIDTH = 2
         self.X_LEFT_MIN = 8
         self.X_RIGHT_MAX = -6
+        self.PROFILE_CACHE_SIZE = 200
 
         self.pitch_last = 0
+        self.profile_cache = dict()  # Screen coordinates of the profile per pitch angle
 
         self.profile_coordinates = np.loadtxt('data/profile.txt', skiprows=0, dtype=float)
         self.profile_coordinates[:, 0] = -(self.profile_coordinates[:, 0] - 0.25)
         self.profile_coordinates[:, 1] = -(self.profile_coordinates[:, 1] - 0.05)
         self.profile_coordinates = self.profile_coordinates * 6
-        self.profile = []
-        for i in range(self.profile_coordinates[:, 0].size - 1):
-            self.profile.append(AntiAliasingLine(self.canvas, length=1, color=color.BLACK, width=2))
-
-        self.v_2 = AntiAliasingLine(self.canvas, length=1, color=color.BLUE, width=self.LINE_WIDTH, arrow='last')
-        self.v_rot = AntiAliasingLine(self.canvas, length=1, color=color.BLUE, width=self.LINE_WIDTH, arrow='last')
-        self.v_rel = AntiAliasingLine(self.canvas, length=1, color=color.GREEN, width=self.LINE_WIDTH, arrow='last')
-        self.F_l = AntiAliasingLine(self.canvas, length=1, color=color.RED, width=self.LINE_WIDTH, arrow='last')
-        self.F_d = AntiAliasingLine(self.canvas, length=1, color=color.RED, width=self.LINE_WIDTH, arrow='last')
-        self.F_R = AntiAliasingLine(self.canvas, length=1, color=color.PURPLE, width=self.LINE_WIDTH, arrow='last')
-        self.F_T = AntiAliasingLine(self.canvas, length=1, color=color.AQUA, width=self.LINE_WIDTH, arrow='last')
-        self.F_Q = AntiAliasingLine(self.canvas, length=1, color=color.AQUA, width=self.LINE_WIDTH, arrow='last')
+        self.profile = AntiAliasingLine(self.canvas, length=len(self.profile_coordinates[:, 0]) - 1,
+                                        color=color.BLACK, width=2, tags=self.name)
+
+        self.v_2 = AntiAliasingLine(self.canvas, length=1, color=color.BLUE, width=self.LINE_WIDTH, arrow='last',
+                                    tags=self.name)
+        self.v_rot = AntiAliasingLine(self.canvas, length=1, color=color.BLUE, width=self.LINE_WIDTH, arrow='last',
+                                      tags=self.name)
+        self.v_rel = AntiAliasingLine(self.canvas, length=1, color=color.GREEN, width=self.LINE_WIDTH, arrow='last',
+                                      tags=self.name)
+        self.F_l = AntiAliasingLine(self.canvas, length=1, color=color.RED, width=self.LINE_WIDTH, arrow='last',
+                                    tags=self.name)
+        self.F_d = AntiAliasingLine(self.canvas, length=1, color=color.RED, width=self.LINE_WIDTH, arrow='last',
+                                    tags=self.name)
+        self.F_R = AntiAliasingLine(self.canvas, length=1, color=color.PURPLE, width=self.LINE_WIDTH, arrow='last',
+                                    tags=self.name)
+        self.F_T = AntiAliasingLine(self.canvas, length=1, color=color.AQUA, width=self.LINE_WIDTH, arrow='last',
+                                    tags=self.name)
+        self.F_Q = AntiAliasingLine(self.canvas, length=1, color=color.AQUA, width=self.LINE_WIDTH, arrow='last',
+                                    tags=self.name)
 
         self.show_v = TK.BooleanVar(value=True)
         self.show_v_rel = TK.BooleanVar(value=True)
@@ -77,9 +89,8 @@ class Chart4(Chart):
 
     def update(self, data):
         # Check if chart needs resizing
-        if not self.width == self.canvas.winfo_width() or not self.height == self.canvas.winfo_height():
-            self.width = self.canvas.winfo_width()
-            self.height = self.canvas.winfo_height()
+        if self.dirty:
+            self.dirty = False
             self.x_right = self.X_RIGHT_MAX
             y_spacing = self.height / abs(self.y_top - self.y_bottom)
             self.x_left = self.width / y_spacing + self.x_right
@@ -94,84 +105,75 @@ class Chart4(Chart):
         self.draw_vectors(data)
 
     def resize_specific(self, data):
-        w_canvas = self.canvas.winfo_width()
+        w_canvas = self.width
         w_legend = self.frame_legend.winfo_width()
         h_legend = self.frame_legend.winfo_height()
         self.canvas.coords(self.frame_legend_id, w_canvas-w_legend/2-self.R-10, h_legend/2+self.T+10)
+        self.profile_cache.clear()
         self.draw_profile(data)
 
     def draw_profile(self, data):
-        theta = -np.deg2rad(data.beta_set)
-        rot = np.asarray([[cos(theta), -sin(theta)], [sin(theta), cos(theta)]])
-        profile_rotated = np.dot(self.profile_coordinates, rot)
-        if not self.x_right == self.X_RIGHT_MAX:
-            profile_rotated *= 0.5
-        x_positions = self.x_to_pos(profile_rotated[:, 0])
-        y_positions = self.y_to_pos(profile_rotated[:, 1])
-
-        for i in range(x_positions.size-1):
-            if not (np.any(x_positions[i:i+2] == -1) or np.any(y_positions[i:i+2] == -1)):
-                self.profile[i].update_coordinates((x_positions[i], y_positions[i],
-                                                    x_positions[i+1], y_positions[i+1]))
-            else:
-                self.profile[i].hide()
-
-    def draw_vectors(self, data):
-        x_pos_cent = self.x_to_pos(0)
-        y_pos_cent = self.y_to_pos(0)
-
-        x_pos = self.x_to_pos(0)
-        y_pos = self.y_to_pos(data.v_2)
-        if not y_pos == -1 and self.show_v.get():
-            self.v_2.update_coordinates((x_pos, y_pos, x_pos_cent, y_pos_cent))
-        else:
-            self.v_2.hide()
-
-        x_pos = self.x_to_pos(data.v_rot)
-        y_pos = self.y_to_pos(0)
-        if not x_pos == -1 and self.show_v.get():
-            self.v_rot.update_coordinates((x_pos, y_pos, x_pos_cent, y_pos_cent))
-        else:
-            self.v_rot.hide()
-
-        x_pos = self.x_to_pos(data.v_rot)
-        y_pos = self.y_to_pos(data.v_2)
-        if not x_pos == -1 and not y_pos == -1 and self.show_v_rel.get():
-            self.v_rel.update_coordinates((x_pos, y_pos, x_pos_cent, y_pos_cent))
-        else:
-            self.v_rel.hide()
-
-        x_pos = self.x_to_pos(data.lift_force[0]/10)
-        y_pos = self.y_to_pos(-data.lift_force[1]/10)
-        if not x_pos == -1 and not y_pos == -1 and self.show_lift_drag.get():
-            self.F_l.update_coordinates((x_pos_cent, y_pos_cent, x_pos, y_pos))
+        coordinates = self.profile_cache.get(data.beta_set)
+        if coordinates is None:
+            theta = -np.deg2rad(data.beta_set)
+            rot = np.asarray([[cos(theta), -sin(theta)], [sin(theta), cos(theta)]])
+            if not self.x_right == self.X_RIGHT_MAX:
+                rot *= 0.5
+            positions = self.limit(self.to_screen(np.dot(self.profile_coordinates, rot)))
+            coordinates = positions.ravel().tolist() if positions is not None else []
+            if len(self.profile_cache) >= self.PROFILE_CACHE_SIZE:
+                self.profile_cache.clear()
+            self.profile_cache[data.beta_set] = coordinates
+
+        if coordinates:
+            self.profile.update_coordinates(coordinates)
         else:
-            self.F_l.hide()
+            self.profile.hide()
+
+    def limit(self, positions):
+        # Keep the longest run of profile points inside the plot area, the other points are moved onto its ends.
+        # Returns None if the profile lies outside
+        inside = self.inside(positions)
+        if inside.all():
+            return positions
+        if not inside.any():
+            return None
+        # The profile is closed, starting it at a point outside puts the points outside at the ends of the runs
+        start = int(np.argmin(inside))
+        positions = np.roll(positions, -start, axis=0)
+        edges = np.diff(np.concatenate(([0], np.roll(inside, -start).astype(int), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        i = np.argmax(ends - starts)
+        positions[:starts[i]] = positions[starts[i]]
+        positions[ends[i]:] = positions[ends[i] - 1]
+        return positions
 
-        x_pos = self.x_to_pos(data.drag_force[0]/10)
-        y_pos = self.y_to_pos(-data.drag_force[1]/10)
-        if not x_pos == -1 and not y_pos == -1 and self.show_lift_drag.get():
-            self.F_d.update_coordinates((x_pos_cent, y_pos_cent, x_pos, y_pos))
-        else:
-            self.F_d.hide()
-
-        x_pos = self.x_to_pos(data.res_force[0]/10)
-        y_pos = self.y_to_pos(-data.res_force[1]/10)
-        if not x_pos == -1 and not y_pos == -1 and self.show_resultant.get():
-            self.F_R.update_coordinates((x_pos_cent, y_pos_cent, x_pos, y_pos))
-        else:
-            self.F_R.hide()
-
-        x_pos = self.x_to_pos(0)
-        y_pos = self.y_to_pos(-data.thrust_force/10)
-        if not x_pos == -1 and not y_pos == -1 and self.show_force.get():
-            self.F_T.update_coordinates((x_pos_cent, y_pos_cent, x_pos, y_pos))
-        else:
-            self.F_T.hide()
-
-        x_pos = self.x_to_pos(data.torque_force/10)
-        y_pos = self.y_to_pos(0)
-        if not x_pos == -1 and not y_pos == -1 and self.show_force.get():
-            self.F_Q.update_coordinates((x_pos_cent, y_pos_cent, x_pos, y_pos))
-        else:
-            self.F_Q.hide()
+    def draw_vectors(self, data):
+        # Tips of the vectors, all transformed at once. The vectors start or end in the origin
+        points = np.array([[0, 0],
+                           [0, data.v_2],
+                           [data.v_rot, 0],
+                           [data.v_rot, data.v_2],
+                           [data.lift_force[0]/10, -data.lift_force[1]/10],
+                           [data.drag_force[0]/10, -data.drag_force[1]/10],
+                           [data.res_force[0]/10, -data.res_force[1]/10],
+                           [0, -data.thrust_force/10],
+                           [data.torque_force/10, 0]])
+        positions = self.to_screen(points)
+        inside = self.inside(positions)
+        positions = positions.tolist()
+        center = positions[0]
+
+        vectors = ((self.v_2, self.show_v, False), (self.v_rot, self.show_v, False),
+                   (self.v_rel, self.show_v_rel, False), (self.F_l, self.show_lift_drag, True),
+                   (self.F_d, self.show_lift_drag, True), (self.F_R, self.show_resultant, True),
+                   (self.F_T, self.show_force, True), (self.F_Q, self.show_force, True))
+        for i, (vector, show, from_center) in enumerate(vectors, 1):
+            if inside[i] and show.get():
+                if from_center:
+                    vector.update_coordinates(center + positions[i])
+                else:
+                    vector.update_coordinates(positions[i] + center)
+            else:
+                vector.hide()
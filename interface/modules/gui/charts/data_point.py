@@ -5,55 +5,120 @@ The MicroWind software is licensed under GPLv3
 Authors: Felix Prigge
 """
 
+import numpy as np
+import interface.modules.gui.gui_colors as color
 
-class DataPoint:
-    """ Data Point
-    Class that stores positional data of dots and prints them on a canvas.
-    This way, dots can be restored after changing the chart type
+# Tcl procedure moving dots of the given size to a flat list of center coordinates with one call from python
+MOVE_PROCEDURE = """
+proc chart_dots_move {canvas items coordinates size} {
+    foreach item $items {x y} $coordinates {
+        $canvas coords $item [expr {$x - $size}] [expr {$y - $size}] [expr {$x + $size}] [expr {$y + $size}]
+    }
+}
+"""
+
+# Tcl interpreters the procedure is defined in. It is defined once per interpreter, not for every instance
+interpreters = set()
+
+
+class DataPoints:
+    """ Data Points
+    Class that stores the values of data points in a growable array with one row per point.
+    The values of all chart types are stored, this way dots can be restored after changing the chart type
     """
 
-    def __init__(self, data, color):
-        self.SIZE = 7
-
-        # Store the data
-        self.color = color
-        self.v_1 = data.v_1
-        self.power = data.power_turb
-        self.tsr = data.tip_speed_ratio
-        self.c_p = data.c_p
-
-        # Initialize
-        self.chart = None
-        self.dot = None
-
-    def draw(self, chart):
-        # Create a dot on the canvas based on the current chart type
-        self.chart = chart
-        self.dot = self.chart.canvas.create_oval(1, 1, 1, 1, fill=self.color, outline='white')
-        self.update_coordinates()
-
-    def update_coordinates(self):
-        # Only update the coordinates of en existing dot.
-        [x, y] = self.calc_xy_positions()
-        self.chart.canvas.coords(self.dot, x-self.SIZE, y-self.SIZE, x+self.SIZE, y+self.SIZE)
-
-    def calc_xy_positions(self):
-        # Calculate the x and y positions of the dot on the canvas
-        if self.chart.name == 'power_v1':
-            x = self.v_1
-            y = self.power
-        elif self.chart.name == 'cp_tsr_0_deg':
-            x = self.tsr
-            y = self.c_p
-        else:
-            x = 0
-            y = 0
-
-        return [self.chart.x_to_pos(x), self.chart.y_to_pos(y)]
+    # Columns of the values used as x and y by the chart types
+    COLUMNS = {'power_v1': (0, 1), 'cp_tsr_0_deg': (2, 3)}
+
+    def __init__(self, capacity=16):
+        self.values = np.zeros((capacity, 4))  # v_1, power, tip speed ratio, c_p
+        self.colors = []
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @staticmethod
+    def sample_values(data):
+        return data.v_1, data.power_turb, data.tip_speed_ratio, data.c_p
+
+    def append(self, values, color):
+        if self.count == len(self.values):
+            # Double the capacity
+            self.values = np.concatenate((self.values, np.zeros_like(self.values)))
+        self.values[self.count] = values
+        self.colors.append(color)
+        self.count += 1
+
+    def chart_values(self, name):
+        # Values of the points on the axes of the chart type, points as rows
+        if name not in self.COLUMNS:
+            return np.zeros((self.count, 2))
+        return self.values[:self.count, list(self.COLUMNS[name])]
 
     def clear(self):
-        # Remove dot from canvas
-        self.chart.canvas.delete(self.dot)
+        self.colors = []
+        self.count = 0
+
+
+class DotLayer:
+    """Dot layer
+    Canvas ovals of the dots of Chart1: a fixed pool of dots for the last samples and one dot per saved point.
+    The layer is handed on to the next chart when the chart type is changed, so the dots are only moved, not
+    created again. All dots are moved with one call to a tcl procedure. The ovals carry the tag 'dot'."""
+
+    def __init__(self, canvas, size=7, count=10):
+        # CONSTANTS
+        self.SIZE = size
+        self.COUNT = count
+        self.HIDDEN = -2 * size  # Position of dots outside the plot area
+
+        self.canvas = canvas
+        self.path = str(canvas)
+        self.tcl_items = getattr(canvas, 'TCL_ITEMS', True)
+        if self.tcl_items and self.canvas.tk not in interpreters:
+            self.canvas.tk.eval(MOVE_PROCEDURE)
+            interpreters.add(self.canvas.tk)
+
+        # Dots of the last samples, their values are kept in a ring
+        self.i_continuous = 0
+        self.continuous = DataPoints(count)
+        self.continuous.values[:] = np.nan
+        self.continuous.count = count
+        self.continuous_items = [self.create(color.GRAY) for i in range(count)]
+
+        # Saved dots
+        self.saved = DataPoints()
+        self.saved_items = []
+
+    def create(self, fill):
+        return self.canvas.create_oval(self.HIDDEN - self.SIZE, self.HIDDEN - self.SIZE,
+                                       self.HIDDEN + self.SIZE, self.HIDDEN + self.SIZE,
+                                       fill=fill, outline='white', tags='dot')
+
+    def move(self, items, positions):
+        # Move dots to the center positions, given as rows of x and y
+        if items and self.tcl_items:
+            self.canvas.tk.call('chart_dots_move', self.path, tuple(items),
+                                tuple(np.ravel(positions).tolist()), self.SIZE)
+        elif items:
+            for item, [x, y] in zip(items, np.reshape(positions, (-1, 2)).tolist()):
+                self.canvas.coords(item, x - self.SIZE, y - self.SIZE, x + self.SIZE, y + self.SIZE)
 
+    def add_continuous(self, values):
+        # Reuse the oldest dot of the pool, returns its item
+        item = self.continuous_items[self.i_continuous]
+        self.continuous.values[self.i_continuous] = values
+        self.i_continuous = (self.i_continuous + 1) % self.COUNT
+        return item
 
+    def add_saved(self, values, fill):
+        # Store a point and create its dot, returns its item
+        self.saved.append(values, fill)
+        self.saved_items.append(self.create(fill))
+        return self.saved_items[-1]
 
+    def clear_saved(self):
+        self.canvas.delete(*self.saved_items)
+        self.saved_items = []
+        self.saved.clear()
@@ -0,0 +1,377 @@
+"""
+This file is part ot the MicroWind software to control and plot data of a wind tunnel including a miniature wind turbine
+Copyright (c) 2024 Institute for Wind Energy Systems, Leibniz University Hannover
+The MicroWind software is licensed under GPLv3
+Authors: Felix Prigge
+"""
+
+import math
+import tkinter as TK
+import numpy as np
+try:
+    from PIL import Image, ImageColor, ImageDraw, ImageFont, ImageTk
+except ImportError:
+    Image = None
+
+# The raster canvas requires Pillow, without it charts are drawn with canvas items
+RASTER_AVAILABLE = Image is not None
+
+
+class RasterWarning(UserWarning):
+    pass
+
+
+class RasterItems:
+    """Raster items
+    Mixin for a canvas that keeps lines, ovals, rectangles and text in python instead of creating canvas items and
+    draws them into an image with PIL. Items are drawn SUPERSAMPLING times larger and reduced by averaging blocks of
+    pixels, which gives real anti-aliasing. Other items and unknown ids are handed on to the canvas class the mixin is
+    combined with.
+    Items that change in at most one render, like axes, grid and reference curves, form the static layer. It is
+    drawn and scaled down once per size. For every frame, only the bounding box of the items changing in every render
+    and of their previous positions is drawn again and scaled down.
+    The mixin does not depend on a display, RasterCanvas shows the frame on a tkinter canvas."""
+
+    TCL_ITEMS = False
+
+    def __init__(self, background=(255, 255, 255), points_to_pixels=96 / 72):
+        # CONSTANTS
+        self.SUPERSAMPLING = 2
+        self.ANCHORS = {'n': 'mt', 's': 'mb', 'e': 'rm', 'w': 'lm', 'center': 'mm',
+                        'ne': 'rt', 'nw': 'lt', 'se': 'rb', 'sw': 'lb'}
+        self.ARROW_SHAPE = (8, 10, 3)  # Default arrow shape of tkinter
+        self.MARGIN = 2  # [px] Added to the bounding box of items for anti-aliasing
+
+        self.items = dict()  # Raster items in drawing order
+        self.modified = set()  # Items changed since the last render
+        self.counter = 0
+        self.image_size = (0, 0)  # Display size of the frame
+        self.static = None  # Static layer at supersampled size
+        self.frame = None  # Frame at display size
+        self.region = None  # Box of the dynamic items in the last frame
+        self.colors = dict()
+        self.fonts = dict()
+        self.background = background
+        self.points_to_pixels = points_to_pixels
+
+    # Items
+    def __create(self, item_type, args, kw):
+        self.counter += 1
+        item = 'raster' + str(self.counter)
+        tags = kw.pop('tags', ())
+        self.items[item] = {'type': item_type,
+                            'coordinates': np.asarray(args, dtype=float).ravel().tolist(),
+                            'options': kw,
+                            'tags': {tags} if isinstance(tags, str) else set(tags),
+                            'changes': 0}
+        self.invalidate(item)
+        return item
+
+    def create_line(self, *args, **kw):
+        return self.__create('line', args, kw)
+
+    def create_oval(self, *args, **kw):
+        return self.__create('oval', args, kw)
+
+    def create_rectangle(self, *args, **kw):
+        return self.__create('rectangle', args, kw)
+
+    def create_text(self, *args, **kw):
+        return self.__create('text', args, kw)
+
+    def find_items(self, tag):
+        if tag == 'all':
+            return list(self.items)
+        if tag in self.items:
+            return [tag]
+        return [item for item, values in self.items.items() if tag in values['tags']]
+
+    def coords(self, item, *args):
+        if item not in self.items:
+            return super().coords(item, *args)
+        if not args:
+            return self.items[item]['coordinates']
+        self.items[item]['coordinates'] = np.asarray(args, dtype=float).ravel().tolist()
+        self.invalidate(item)
+
+    def itemconfigure(self, item, cnf=None, **kw):
+        if item not in self.items:
+            return super().itemconfigure(item, cnf, **kw)
+        self.items[item]['options'].update(cnf or {}, **kw)
+        self.invalidate(item)
+
+    itemconfig = itemconfigure
+
+    def move(self, tag, dx, dy):
+        raster_item = tag in self.items
+        for item in self.find_items(tag):
+            coordinates = self.items[item]['coordinates']
+            coordinates[0::2] = [x + dx for x in coordinates[0::2]]
+            coordinates[1::2] = [y + dy for y in coordinates[1::2]]
+            # Moving an item does not make it dynamic, it only changes the static layer
+            self.static = None
+            self.invalidate()
+        if not raster_item:
+            super().move(tag, dx, dy)
+
+    def delete(self, *args):
+        for tag in args:
+            raster_item = tag in self.items
+            for item in self.find_items(tag):
+                if self.items.pop(item)['changes'] < 2:
+                    self.static = None
+                self.invalidate()
+            if not raster_item:
+                super().delete(tag)
+
+    def tag_raise(self, tag, above=None):
+        # Raster items are always drawn below the canvas items, they are only raised among each other
+        raster_item = tag in self.items
+        for item in self.find_items(tag):
+            self.items[item] = self.items.pop(item)
+            self.static = None
+            self.invalidate()
+        if not raster_item:
+            super().tag_raise(tag, *(() if above is None else (above,)))
+
+    # Rendering
+    def invalidate(self, item=None):
+        if item is not None:
+            self.modified.add(item)
+
+    def render_frame(self, size):
+        # Update the frame at display size, returns the changed box or None
+        if not size == self.image_size:
+            # After a resize all items belong to the static layer again
+            self.image_size = size
+            self.static = None
+            for values in self.items.values():
+                values['changes'] = 0
+
+        if not self.modified and self.static is not None:
+            return None
+
+        # Items changing in a second render move to the dynamic layer
+        for item in self.modified:
+            if item in self.items:
+                self.items[item]['changes'] += 1
+                if self.items[item]['changes'] <= 2:
+                    self.static = None
+        self.modified.clear()
+
+        changed = None
+        if self.static is None:
+            scaled_size = (size[0] * self.SUPERSAMPLING, size[1] * self.SUPERSAMPLING)
+            self.static = Image.new('RGB', scaled_size, self.background)
+            self.draw_items(self.static, [values for values in self.items.values() if values['changes'] < 2])
+            self.frame = self.static.reduce(self.SUPERSAMPLING)
+            self.region = None
+            changed = (0, 0, size[0], size[1])
+
+        # The dynamic items are drawn on the static layer within their box and the box of the last frame
+        dynamic = [values for values in self.items.values()
+                   if values['changes'] >= 2 and not values['options'].get('state') == 'hidden']
+        region = self.bounding_box(dynamic)
+        box = self.union(region, self.region)
+        self.region = region
+        if box is None:
+            return changed
+        [x_0, y_0, x_1, y_1] = box
+        s = self.SUPERSAMPLING
+        image = self.static.crop((x_0 * s, y_0 * s, x_1 * s, y_1 * s))
+        self.draw_items(image, dynamic, (x_0 * s, y_0 * s))
+        self.frame.paste(image.reduce(s), (x_0, y_0))
+        return changed or box
+
+    def bounding_box(self, items):
+        # Box of the items in display pixels, limited to the frame
+        box = None
+        for values in items:
+            box = self.union(box, self.item_box(values))
+        return box
+
+    def item_box(self, values):
+        coordinates = values['coordinates']
+        if len(coordinates) < 2:
+            return None
+        options = values['options']
+        x = coordinates[0::2]
+        y = coordinates[1::2]
+        margin = self.MARGIN + float(options.get('width', 1))
+        if values['type'] == 'line' and options.get('arrow') == 'last':
+            margin += max(self.ARROW_SHAPE)
+        box = [min(x) - margin, min(y) - margin, max(x) + margin, max(y) + margin]
+        if values['type'] == 'text':
+            if float(options.get('angle', 0)):
+                # Rotated text is rare, its box is not calculated
+                return 0, 0, self.image_size[0], self.image_size[1]
+            font = self.font(options.get('font', 'TkDefaultFont 10'))
+            anchor = self.ANCHORS.get(options.get('anchor', 'center'), 'mm')
+            try:
+                text_box = font.getbbox(str(options.get('text', '')), anchor=anchor)
+            except TypeError:
+                # Bitmap fonts of Pillow before 10.1 have no anchors
+                return 0, 0, self.image_size[0], self.image_size[1]
+            box = [x[0] + text_box[0] / self.SUPERSAMPLING - self.MARGIN,
+                   y[0] + text_box[1] / self.SUPERSAMPLING - self.MARGIN,
+                   x[0] + text_box[2] / self.SUPERSAMPLING + self.MARGIN,
+                   y[0] + text_box[3] / self.SUPERSAMPLING + self.MARGIN]
+        box = (max(math.floor(box[0]), 0), max(math.floor(box[1]), 0),
+               min(math.ceil(box[2]), self.image_size[0]), min(math.ceil(box[3]), self.image_size[1]))
+        if box[0] >= box[2] or box[1] >= box[3]:
+            # Outside the frame
+            return None
+        return box
+
+    def union(self, box, other):
+        if box is None:
+            return other
+        if other is None:
+            return box
+        return min(box[0], other[0]), min(box[1], other[1]), max(box[2], other[2]), max(box[3], other[3])
+
+    def draw_items(self, image, items, offset=(0, 0)):
+        # Draw items into an image at supersampled size, whose origin lies at offset
+        draw = ImageDraw.Draw(image)
+        for values in items:
+            options = values['options']
+            if options.get('state') == 'hidden':
+                continue
+            coordinates = [value * self.SUPERSAMPLING - offset[i % 2] for i, value in enumerate(values['coordinates'])]
+            if values['type'] == 'line' and len(coordinates) >= 4:
+                self.draw_line(draw, coordinates, options)
+            elif values['type'] == 'oval' and len(coordinates) == 4:
+                draw.ellipse(self.box(coordinates), fill=self.color(options.get('fill')),
+                             outline=self.color(options.get('outline')), width=self.SUPERSAMPLING)
+            elif values['type'] == 'rectangle' and len(coordinates) == 4:
+                draw.rectangle(self.box(coordinates), fill=self.color(options.get('fill')),
+                               outline=self.color(options.get('outline', 'black')),
+                               width=self.line_width(options.get('width', 1)))
+            elif values['type'] == 'text' and len(coordinates) == 2:
+                self.draw_text(image, draw, coordinates, options)
+
+    def draw_line(self, draw, coordinates, options):
+        fill = self.color(options.get('fill', 'black'))
+        width = self.line_width(options.get('width', 1))
+        points = np.reshape(coordinates, (-1, 2))
+        if options.get('arrow') == 'last':
+            # Arrowhead at the last point, the line ends at its neck
+            direction = points[-1] - points[-2]
+            length = np.hypot(*direction)
+            if length > 0:
+                direction = direction / length
+                normal = np.array([-direction[1], direction[0]])
+                [neck, tail, side] = [value * self.SUPERSAMPLING for value in self.ARROW_SHAPE]
+                side += width / 2
+                tip = points[-1].copy()
+                points[-1] = tip - direction * neck
+                draw.polygon([tuple(tip), tuple(tip - direction * tail + normal * side), tuple(points[-1]),
+                              tuple(tip - direction * tail - normal * side)], fill=fill)
+        draw.line(points.ravel().tolist(), fill=fill, width=width, joint='curve')
+
+    def draw_text(self, image, draw, coordinates, options):
+        font = self.font(options.get('font', 'TkDefaultFont 10'))
+        fill = self.color(options.get('fill', 'black'))
+        anchor = self.ANCHORS.get(options.get('anchor', 'center'), 'mm')
+        text = str(options.get('text', ''))
+        angle = float(options.get('angle', 0))
+        if not angle:
+            draw.text(coordinates, text, fill=fill, font=font, anchor=anchor)
+            return
+
+        # Rotated text is drawn separately and rotated around its anchor
+        box = draw.textbbox((0, 0), text, font=font, anchor=anchor)
+        label = Image.new('RGBA', (box[2] - box[0] + 2, box[3] - box[1] + 2), (0, 0, 0, 0))
+        ImageDraw.Draw(label).text((-box[0] + 1, -box[1] + 1), text, fill=fill, font=font, anchor=anchor)
+        rotated = label.rotate(angle, expand=True)
+        theta = np.deg2rad(angle)
+        corners = np.array([[box[0], box[1]], [box[2], box[1]], [box[0], box[3]], [box[2], box[3]]], dtype=float)
+        x = corners[:, 0] * np.cos(theta) + corners[:, 1] * np.sin(theta)
+        y = -corners[:, 0] * np.sin(theta) + corners[:, 1] * np.cos(theta)
+        image.paste(rotated, (int(round(coordinates[0] + x.min())), int(round(coordinates[1] + y.min()))), rotated)
+
+    # Conversions
+    def box(self, coordinates):
+        return [min(coordinates[0], coordinates[2]), min(coordinates[1], coordinates[3]),
+                max(coordinates[0], coordinates[2]), max(coordinates[1], coordinates[3])]
+
+    def line_width(self, width):
+        return max(int(round(float(width) * self.SUPERSAMPLING)), 1)
+
+    def color(self, name):
+        if not name:
+            return None
+        if name not in self.colors:
+            self.colors[name] = self.rgb(name)
+        return self.colors[name]
+
+    def rgb(self, name):
+        return ImageColor.getrgb(name)[0:3]
+
+    def font(self, description):
+        # Font description 'family size style', the size is given in points
+        if description not in self.fonts:
+            parts = str(description).split()
+            size = int(parts[1]) if len(parts) > 1 else 10
+            size = max(int(round(size * self.points_to_pixels * self.SUPERSAMPLING)), 1)
+            file_names = ('arialbd.ttf', 'DejaVuSans-Bold.ttf') if 'bold' in parts else ('arial.ttf', 'DejaVuSans.ttf')
+            font = None
+            for file_name in file_names:
+                try:
+                    font = ImageFont.truetype(file_name, size)
+                    break
+                except OSError:
+                    pass
+            if font is None:
+                try:
+                    font = ImageFont.load_default(size)
+                except TypeError:
+                    # Pillow before 10.1 only has a bitmap font of fixed size
+                    font = ImageFont.load_default()
+            self.fonts[description] = font
+        return self.fonts[description]
+
+
+class RasterCanvas(RasterItems, TK.Canvas):
+    """Raster canvas
+    Replacement for the tkinter canvas of a chart, drawing lines, ovals, rectangles and text with RasterItems.
+    The frame is shown as one image item, a render is scheduled when the tk event loop is idle after a change
+    and only the changed box of the frame is copied to the image.
+    Windows, e.g. legends, stay canvas items. Smoothed lines are drawn as polylines.
+    The charts use the same methods as on the tkinter canvas, only the tcl procedures for batched updates are
+    not available (TCL_ITEMS)."""
+
+    def __init__(self, master=None, **kw):
+        TK.Canvas.__init__(self, master, **kw)
+        RasterItems.__init__(self)
+        self.render_pending = False
+        self.photo = None
+        self.points_to_pixels = self.winfo_fpixels('1p')
+        self.background = self.color(self.cget('background'))
+        self.image_item = TK.Canvas.create_image(self, 0, 0, anchor='nw')
+
+    def rgb(self, name):
+        # Colors are resolved by tk, so all tk color names can be used
+        return tuple(value // 257 for value in self.winfo_rgb(name))
+
+    def invalidate(self, item=None):
+        super().invalidate(item)
+        if not self.render_pending:
+            self.render_pending = True
+            self.after_idle(self.render)
+
+    def render(self):
+        self.render_pending = False
+        size = (self.winfo_width(), self.winfo_height())
+        if size[0] < 2 or size[1] < 2:
+            return
+        if not size == self.image_size:
+            self.photo = ImageTk.PhotoImage('RGB', size)
+            TK.Canvas.itemconfigure(self, self.image_item, image=self.photo)
+        box = self.render_frame(size)
+        if box == (0, 0, size[0], size[1]):
+            self.photo.paste(self.frame)
+        elif box is not None:
+            # Copy only the changed box into the image shown on the canvas
+            part = ImageTk.PhotoImage(self.frame.crop(box))
+            self.tk.call(str(self.photo), 'copy', str(part), '-to', box[0], box[1])
@@ -14,6 +14,7 @@ from interface.modules.gui.charts.chart1b import Chart1b
 from interface.modules.gui.charts.chart2 import Chart2
 from interface.modules.gui.charts.chart3 import Chart3
 from interface.modules.gui.charts.chart4 import Chart4
+from interface.modules.gui.charts.raster_canvas import RasterCanvas
 import interface.modules.gui.gui_colors as color
 
 
@@ -121,19 +122,19 @@ class MainWindow:
                 button_charts.configure(text='Aerodynamics')
                 self.frame_chart2.grid()
                 self.frame_chart3.grid()
-                self.manager.C2.active = True
-                self.manager.C3.active = True
+                self.show_chart('C2')
+                self.show_chart('C3')
                 self.frame_chart4.grid_remove()
-                self.manager.C4.active = False
+                self.hide_chart('C4')
             else:
                 self.manager.aerodynamics_flag = True
                 button_charts.configure(text='Monitor')
                 self.frame_chart2.grid_remove()
                 self.frame_chart3.grid_remove()
-                self.manager.C2.active = False
-                self.manager.C3.active = False
+                self.hide_chart('C2')
+                self.hide_chart('C3')
                 self.frame_chart4.grid()
-                self.manager.C4.active = True
+                self.show_chart('C4')
 
         button_charts = ttk.Button(frame_buttons, text="Aerodynamics", command=switch_chart_type,
                                    takefocus=False, width=14)
@@ -174,6 +175,11 @@ class MainWindow:
         notification = ttk.Label(self.frame_head, text="Speed Limit Reached",
                                  font='Bahnschrift 30 bold', justify=TK.CENTER, foreground=color.RED)
         notification.pack(side='left', expand=True)
+
+        # Profiler overlay
+        if self.manager.profile:
+            self.label_profile = ttk.Label(self.frame_head, font='Consolas 8', justify=TK.LEFT)
+            self.label_profile.pack(side='right', padx=5)
         return [notification, button_data_logger]
 
     def profile_and_controller_selection(self):
@@ -293,11 +299,19 @@ class MainWindow:
         radio_wind_profile.grid(row=0, column=2, sticky=TK.W, padx=10)
         var_radio_wind.set(2)
 
+        # Wind speed turbulent radio button. The slider sets the mean wind speed
+        def sel_turbulent_wind():
+            sel_constant_wind()
+            self.manager.TurbulentWind.reset(var_wind.get() / 100)
+
+        radio_wind_turbulent = ttk.Radiobutton(frame_radio_wind, text="Turbulent", variable=var_radio_wind,
+                                               value=4, command=sel_turbulent_wind)
+        radio_wind_turbulent.grid(row=0, column=3, sticky=TK.W, padx=10)
+
         # Wind speed profile start button
         def start_wind_profile():
             if not self.manager.wind_profile_run_flag:
-                with open('wind/' + self.var_wind_sel.get() + '.txt', 'rt') as FILE_Wind:
-                    self.manager.open_wind_profile(FILE_Wind)
+                self.manager.open_wind_profile('wind/' + self.var_wind_sel.get() + '.txt')
                 self.manager.wind_mode = 3
                 button_wind_profile_start.configure(text="Stop")
                 self.manager.wind_profile_run_flag = True
@@ -541,6 +555,23 @@ class MainWindow:
     def vertical_space(self):
         TK.Label(self.frame_control, text=' ', fg='white').grid(row=9, column=0, columnspan=2)
 
+    def show_chart(self, name):
+        # Create the chart on its first display
+        if getattr(self.manager, name) is None:
+            setattr(self.manager, name, self.chart_factories[name]())
+        getattr(self.manager, name).active = True
+
+    def hide_chart(self, name):
+        chart = getattr(self.manager, name)
+        if chart is None:
+            return
+        if self.manager.release_charts:
+            # Free the canvas items and data of the chart, it is created again when shown
+            chart.release()
+            setattr(self.manager, name, None)
+        else:
+            chart.active = False
+
     def charts(self):
         # Control widgets for chart1
         var_radio_chart1 = TK.IntVar()
@@ -549,23 +580,33 @@ class MainWindow:
         frame_radio_chart1.pack(side='top', anchor='e', padx=10)
 
         def sel_chart1_type():
-            self.canvas_chart1.delete('all')
-            dots = self.manager.C1.save_dots
-            if var_radio_chart1.get() == 1:
-                self.manager.C1 = Chart1a(self.canvas_chart1)
+            # Both chart types are kept on the canvas, the hidden one keeps its static content.
+            # A chart type is created on first use, the dots are handed on to it
+            # With release_charts, the previous chart type is deleted instead
+            chart_type = var_radio_chart1.get()
+            previous = self.manager.C1
+            if previous is self.chart1_types.get(chart_type):
+                return
+            if self.manager.release_charts:
+                previous.release()
+                self.chart1_types = {key: chart for key, chart in self.chart1_types.items() if chart is not previous}
             else:
-                self.manager.C1 = Chart1b(self.canvas_chart1)
+                previous.hide()
+            if chart_type in self.chart1_types:
+                self.chart1_types[chart_type].show()
+            elif chart_type == 1:
+                self.chart1_types[chart_type] = Chart1a(self.canvas_chart1, previous.dots)
+            else:
+                self.chart1_types[chart_type] = Chart1b(self.canvas_chart1, previous.dots)
+            self.manager.C1 = self.chart1_types[chart_type]
 
-            self.manager.C1.save_dots = dots
-            self.manager.C1.redraw_dots()
-            self.manager.C1.update(self.manager.driver, force_resize=True)
+            self.manager.C1.update(self.manager.driver.sample())
 
         def take_data_point():
-            self.manager.C1.take_save_dot(self.manager.driver, var_radio_chart1_color.get())
+            self.manager.C1.take_save_dot(self.manager.driver.sample(), var_radio_chart1_color.get())
 
         def clear_dots():
-            for d in self.manager.C1.save_dots:
-                d.clear()
+            self.manager.C1.clear_save_dots()
 
         radio_chart1_power = ttk.Radiobutton(frame_radio_chart1, text="Power curve", variable=var_radio_chart1,
                                              value=1, command=sel_chart1_type)
@@ -599,25 +640,31 @@ class MainWindow:
         button_chart1_clear.grid(row=0, column=7, sticky=TK.W, padx=10, pady=0)
         TK.Canvas(frame_radio_chart1, height=30, width=5, background='white').grid(row=0, column=8)
 
-        canvas_chart1 = TK.Canvas(self.frame_chart1, height=1000, width=611, highlightthickness=0)
+        # Charts are drawn on canvas items or into images
+        Canvas = RasterCanvas if self.manager.raster else TK.Canvas
+
+        canvas_chart1 = Canvas(self.frame_chart1, height=1000, width=611, highlightthickness=0)
         canvas_chart1.pack(side='top')
 
         self.manager.C1 = Chart1a(canvas_chart1)
+        self.chart1_types = {1: self.manager.C1}
 
-        canvas_chart2 = TK.Canvas(self.frame_chart2, height=1000, width=2000, highlightthickness=0)
+        canvas_chart2 = Canvas(self.frame_chart2, height=1000, width=2000, highlightthickness=0)
         canvas_chart2.pack(side='top')
 
-        self.manager.C2 = Chart2(canvas_chart2)
-
-        canvas_chart3 = TK.Canvas(self.frame_chart3, height=334, width=2000, highlightthickness=0)
+        canvas_chart3 = Canvas(self.frame_chart3, height=334, width=2000, highlightthickness=0)
         canvas_chart3.pack(side='top')
 
-        self.manager.C3 = Chart3(canvas_chart3)
-
-        canvas_chart4 = TK.Canvas(self.frame_chart4, height=2000, width=2000, highlightthickness=0)
+        canvas_chart4 = Canvas(self.frame_chart4, height=2000, width=2000, highlightthickness=0)
         canvas_chart4.pack(side='top')
 
-        self.manager.C4 = Chart4(canvas_chart4)
-        self.manager.C4.active = False
+        # Charts are created when they are shown first, the aerodynamics chart is hidden at start
+        history_length = int(round(self.manager.HISTORY_DURATION * self.manager.LOOP_RATE))
+        self.chart_factories = {'C2': lambda: Chart2(canvas_chart2, self.manager.clock, window=self.manager.TIME_WINDOW,
+                                                     history_length=history_length),
+                                'C3': lambda: Chart3(canvas_chart3),
+                                'C4': lambda: Chart4(canvas_chart4)}
+        self.show_chart('C2')
+        self.show_chart('C3')
 
         return canvas_chart1
@@ -6,24 +6,59 @@ Authors: Felix Prigge
 """
 
 import time
+import warnings
 from interface.modules.gui.main_window import MainWindow
 from interface.modules.arcade_game import ArcadeGame
-from interface.modules.windprofile import WindProfile, RandomWind
+from interface.modules.windprofile import WindProfile, RandomWind, TurbulentWind
+from interface.modules.acquisition import Acquisition
+from interface.modules.profiler import Profiler
+from interface.modules.scheduler import LoopScheduler
+from interface.modules.capture import ReplayTransport
+from interface.modules.gui.charts.raster_canvas import RASTER_AVAILABLE, RasterWarning
 
 
 class GUIManager:
     """MicoWind GUI Manager
-    Runs the loop to execute data transfer, calculations and refreshing of the graphs
+    Runs the loop to execute data transfer and calculations at the given rate.
+    The charts are rendered in a separate loop at their own rates from the sample of the driver after the last cycle.
+    Charts on hidden canvases are skipped. Both loops are scheduled by deadline.
+    If rendering takes too long, chart updates are decimated.
+    Every cycle starts with a tick of the clock of the driver, so all components use the same time within a cycle.
+    All frames received by the acquisition thread since the last cycle are processed and logged with their own time.
+    If the driver replays a capture (ReplayTransport), the loop runs without acquisition thread on the clock of the
+    driver. A replay cycle is only calculated when the next recorded frame is due and ticks after receiving it.
+    With fast=True, the loop runs as fast as possible instead of in real time, e.g. for fast replays or simulations
+    on a VirtualClock.
+    The stages of every cycle are timed by a profiler. With profile=True, their percentiles are shown in the window
+    and exported to profile.json when the program is closed.
+    With raster=True, the charts are drawn into images with anti-aliasing (RasterCanvas) if Pillow is installed.
+    Charts are created when they are shown first. With release_charts=True, hidden charts are deleted as well.
+    The time series shows the last window seconds and keeps at least the last 60 s.
     """
 
-    def __init__(self, root, driver, logger):
+    def __init__(self, root, driver, logger, fast=False, profile=False, rate=20, window=6, raster=False,
+                 release_charts=False):
         # CONSTANTS
-        self.REFRESH_RATE = 50
-        self.REFRESH_ARCADE = 50
+        self.LOOP_RATE = rate  # Hz
+        self.FAST_RATE = 1000  # Hz, loop rate in fast mode
+        self.ACQUISITION_RATE = rate  # Hz
+        self.TIME_WINDOW = window  # [s] Time span shown in the time series
+        self.HISTORY_DURATION = max(60, window)  # [s] Time span kept by the time series
+        self.RENDER_RATES = {'C1': 10, 'C2': 20, 'C3': 10, 'C4': 20}  # Hz
+        self.PROFILE_INTERVAL = 1  # [s] Refresh of the profiler overlay
 
         # Handles
         self.driver = driver
         self.logger = logger
+        self.clock = driver.clock
+        self.replay = isinstance(driver.port, ReplayTransport)
+        self.fast = fast
+        self.profile = profile
+        self.raster = raster
+        if raster and not RASTER_AVAILABLE:
+            warnings.warn('Pillow is not installed, charts are drawn with canvas items', RasterWarning)
+            self.raster = False
+        self.release_charts = release_charts
 
         # Flags
         self.start_flag = False
@@ -34,8 +69,10 @@ class GUIManager:
         self.pause_charts_flag = True
 
         # Variables
-        self.last_loop = 0
-        self.chart_update = 0
+        self.profile_last = 0
+        self.sample = None  # Sample of the driver at the end of the last control cycle
+        self.render_due = {name: 0 for name in self.RENDER_RATES}
+        self.rendering = False
 
         # Objects
         self.arcade_game = None
@@ -45,6 +82,10 @@ class GUIManager:
         self.C4 = None
         self.wind_profile = None
         self.controller = None
+        self.acquisition = None
+        self.profiler = Profiler()
+        self.scheduler = LoopScheduler(self.FAST_RATE if fast else self.LOOP_RATE, decimate=False)
+        self.render_scheduler = LoopScheduler(max(self.RENDER_RATES.values()))
 
         # Start main window
         self.window = MainWindow(root, self)
@@ -52,6 +93,14 @@ class GUIManager:
         # Initialize random wind object
         self.RandomWind = RandomWind()
 
+        # Initialize turbulent wind object
+        self.TurbulentWind = TurbulentWind(self.clock)
+
+        # Serial communication runs in its own thread, unless the loop drives the clock
+        if self.driver.arduino_connected and not self.replay and not self.fast:
+            self.acquisition = Acquisition(self.driver, rate=self.ACQUISITION_RATE)
+            self.acquisition.start()
+
     def run(self):
         if self.arcade_flag:
             # Run arcade game
@@ -59,25 +108,41 @@ class GUIManager:
             self.arcade_game.run()
             return
 
-        if self.run_flag:
-            # Run the main loop
-            self.window.window.after(self.REFRESH_RATE, self.run)
-        else:
+        if not self.run_flag:
             self.close_program()
             return
 
-        # Track cycle times
-        self.driver.dt_cycle = time.time() - self.last_loop
-        self.last_loop = time.time()
+        if not self.rendering:
+            # Start the render loop, also after returning from the arcade game
+            self.rendering = True
+            self.window.window.after(1, self.render)
 
-        if self.driver.arduino_connected:
-            # Read from arduino
-            self.driver.read_from_arduino()
+        # Schedule the next cycle after this one, also if it fails
+        self.scheduler.begin()
+        try:
+            self.cycle()
+        finally:
+            self.window.window.after(self.scheduler.delay(), self.run)
+
+    def cycle(self):
+        # Start new cycle. A replay sets the clock to the time of the frame it hands out, so it ticks after receiving
+        if not self.replay:
+            self.driver.dt_cycle = self.clock.tick()
+        self.profiler.begin()
+
+        # Read from arduino. Wind and controllers work on a sample of the latest measurements
+        samples = self.receive()
+        if self.replay:
+            if len(samples) == 0:
+                # Nothing to calculate until the next recorded frame is due
+                return
+            self.driver.dt_cycle = self.clock.tick()
+        sample = self.driver.sample()
 
         # Set wind speed depending on mode
         if self.window.var_radio_wind.get() == 1:
             # Random
-            self.driver.v_set = self.RandomWind.calc(self.driver.v_1, self.window.var_wind.get())
+            self.driver.v_set = self.RandomWind.calc(sample.v_1, self.window.var_wind.get())
         elif self.window.var_radio_wind.get() == 2:
             # Manually
             self.driver.v_set = self.window.var_wind.get() / 100
@@ -85,9 +150,13 @@ class GUIManager:
             # Profile
             if self.wind_profile_run_flag:
                 self.driver.v_set = self.wind_profile.calc()
+        elif self.window.var_radio_wind.get() == 4:
+            # Turbulent
+            self.driver.v_set = self.TurbulentWind.calc(self.window.var_wind.get() / 100)
+        self.profiler.mark('wind')
 
         # Set pitch and torque depending on mode
-        if self.driver.rot_turb > self.driver.ROT_MAX:
+        if sample.rot_turb > self.driver.ROT_MAX:
             # Emergency shut down
             self.window.notification.configure(text='Speed limit')
             self.window.var_radio_turbine.set(2)
@@ -98,13 +167,13 @@ class GUIManager:
         elif self.window.var_radio_turbine.get() == 1:
             # External controller
             self.window.notification.configure(text=' ')
-            [pitch, torque_level] = self.controller.calc(self.driver.v_1,
-                                                         self.driver.rot_turb,
-                                                         self.driver.power_turb,
-                                                         self.driver.torque,
-                                                         self.driver.thrust_force,
-                                                         self.driver.tip_speed_ratio,
-                                                         self.driver.dt_cycle)
+            [pitch, torque_level] = self.controller.calc(sample.v_1,
+                                                         sample.rot_turb,
+                                                         sample.power_turb,
+                                                         sample.torque,
+                                                         sample.thrust_force,
+                                                         sample.tip_speed_ratio,
+                                                         sample.dt_cycle)
             self.driver.beta_set = pitch
             self.driver.torque_level = torque_level
         elif self.window.var_radio_turbine.get() == 2:
@@ -112,9 +181,10 @@ class GUIManager:
             self.window.notification.configure(text=' ')
             self.driver.beta_set = self.window.var_pitch.get()
             self.driver.torque_set = self.window.var_torque.get() / 100
-            self.window.label_torque_value.configure(text=str(int(self.driver.torque*100)/100))
+            self.window.label_torque_value.configure(text=str(int(sample.torque*100)/100))
+        self.profiler.mark('controller')
 
-        if self.driver.rot_turb == 0:
+        if sample.rot_turb == 0:
             # Enable start button only if turbine stands still
             self.window.button_turbine_start.configure(state='normal')
             if self.start_flag:
@@ -125,35 +195,97 @@ class GUIManager:
 
         # Print to terminal
         self.driver.print_values()
+        self.profiler.mark('print_values')
 
-        if self.driver.arduino_connected:
-            # Write to arduino
-            self.driver.write_to_arduino()
+        # Write to arduino
+        self.transmit()
+        self.profiler.mark('transmit')
+
+        # Sample with the set values of this cycle for the logger and the render loop
+        self.sample = self.driver.sample()
+        if len(samples) > 0:
+            samples[-1] = self.sample
+        if self.C2 is not None:
+            # The time series keeps every sample, also between its renders
+            for sample in samples:
+                self.C2.append(sample)
 
         if self.logger.active:
-            # Log data to text file
-            self.logger.log(self.driver)
+            # Log every new frame once with its own time
+            for sample in samples:
+                if not self.logger.active:
+                    break
+                self.logger.log(sample, timestamp=sample.time)
         else:
             self.window.button_data_logger.configure(text='Log data')
+        self.profiler.mark('logger')
+        self.profiler.end()
+
+        if self.profile and self.clock.time() - self.profile_last > self.PROFILE_INTERVAL:
+            self.profile_last = self.clock.time()
+            self.window.label_profile.configure(text=self.profiler.report() + '\n' + self.scheduler.report()
+                                                + '\n' + self.render_scheduler.report())
+
+    def render(self):
+        # Render loop, independent of the control loop
+        if not self.run_flag or self.arcade_flag:
+            self.rendering = False
+            return
+
+        self.render_scheduler.begin()
+        try:
+            # Charts are skipped in some cycles if rendering is overloaded
+            if self.sample is not None and self.render_scheduler.charts_due():
+                now = time.perf_counter()
+                for name, rate in self.RENDER_RATES.items():
+                    chart = getattr(self, name)
+                    if chart is None or not chart.active or not chart.mapped or now < self.render_due[name]:
+                        continue
+                    self.render_due[name] = max(self.render_due[name] + 1 / rate, now)
+                    time_start = time.perf_counter_ns()
+                    chart.update(self.sample)
+                    self.profiler.record(name, time.perf_counter_ns() - time_start)
+        finally:
+            self.window.window.after(self.render_scheduler.delay(), self.render)
+
+    def receive(self):
+        # Process the new data frames. Returns a sample of every frame, oldest first
+        samples = []
+        if self.acquisition is not None:
+            # Process every frame of the acquisition thread since the last cycle, so no frame is skipped
+            frames = self.acquisition.read()
+            self.profiler.mark('acquisition')
+            for counter, timestamp, frame in frames:
+                self.driver.process_frame(frame, timestamp)
+                samples.append(self.driver.sample())
+            if len(frames) > 0:
+                self.profiler.mark('process_frame')
+        elif self.driver.arduino_connected and (not self.replay or self.driver.port.due()):
+            frame = self.driver.receive_frame()
+            self.profiler.mark('request_frame')
+            if frame is not None:
+                self.driver.process_frame(frame, self.clock.time())
+                samples.append(self.driver.sample())
+                self.profiler.mark('process_frame')
+            if self.replay and self.driver.port.finished:
+                # Keep the last state of the replay on screen
+                print('replay finished')
+                self.driver.arduino_connected = False
+        return samples
+
+    def transmit(self):
+        # With the acquisition thread running, set values are sent with its next command frame.
+        # Otherwise, a command frame is sent in turn with every data frame received
+        if self.acquisition is None and self.driver.arduino_connected and self.driver.data_received:
+            self.driver.write_to_arduino()
 
-        if self.chart_update == 0:
-            if self.C1.active:
-                self.C1.update(self.driver)
-            if self.C3.active:
-                self.C3.update(self.driver)
-            self.chart_update = 1
-        elif self.chart_update == 1:
-            if self.C2.active:
-                self.C2.update(self.driver)
-            if self.C4.active:
-                self.C4.update(self.driver)
-            self.chart_update = 0
-
-    def open_wind_profile(self, file):
+    def open_wind_profile(self, file_name):
         print('open wind profile')
-        self.wind_profile = WindProfile(file)
+        self.wind_profile = WindProfile(file_name, self.clock)
 
     def close_program(self):
+        if self.acquisition is not None:
+            self.acquisition.stop()
         if self.driver.arduino_connected:
             self.driver.read_from_arduino()
             self.driver.v_set = 0
@@ -161,8 +293,14 @@ class GUIManager:
             self.driver.beta_set = self.driver.PITCH_IDLE
             self.driver.write_to_arduino()
             self.driver.port.close()
+        self.driver.stop_capture()
         if self.logger.active:
             self.logger.end()
+        print(self.scheduler.report())
+        print(self.render_scheduler.report())
+        if self.profile:
+            self.profiler.export()
+            print(self.profiler.report())
 
         self.window.window.destroy()
         self.window.window.quit()
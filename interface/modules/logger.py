@@ -5,73 +5,153 @@ The MicroWind software is licensed under GPLv3
 Authors: Felix Prigge
 """
 
+import os
 import time
+import json
+import warnings
+import numpy as np
+
+# Binary log file: MAGIC, header length (uint32), header (json list of dtype fields), fixed width records
+MAGIC = b'MWLOG\x01'
+
+# Logged channels as (column name, attribute of the sample, type)
+CHANNELS = [('time', None, '<f8'),
+            ('v_set', 'v_set', '<f8'),
+            ('v_act', 'v_1', '<f8'),
+            ('v_2', 'v_2', '<f8'),
+            ('anemometer', 'anemometer', '<f8'),
+            ('power_wind', 'power_wind', '<f8'),
+            ('tip_speed_ratio', 'tip_speed_ratio', '<f8'),
+            ('beta_set', 'beta_set', '<f8'),
+            ('rot_turb', 'rot_turb', '<f8'),
+            ('torque', 'torque', '<f8'),
+            ('torque_level', 'torque_level', '<i2'),
+            ('current', 'current', '<f8'),
+            ('voltage', 'voltage', '<f8'),
+            ('power_turb', 'power_turb', '<f8'),
+            ('thrust_force', 'thrust_force', '<f8'),
+            ('c_pitch_p', 'c_pitch_p', '<f8'),
+            ('c_pitch_i', 'c_pitch_i', '<f8'),
+            ('c_pitch_d', 'c_pitch_d', '<f8')]
 
 
 class Logger:
     """Data logger
-    Handles file and writes data stream"""
+    Collects samples as fixed width records in a preallocated buffer and writes them to file in blocks,
+    at the latest every FLUSH_INTERVAL seconds, so little data is lost in case of a crash.
+    Files ending with .txt are written as comma separated text, all others as binary records (see read_log)."""
+
+    def __init__(self, file_name='log.bin'):
+        # CONSTANTS
+        self.BLOCK_SIZE = 1000  # Records per write
+        self.FLUSH_INTERVAL = 1  # [s] Longest time records are kept in the buffer
+        self.DTYPE = np.dtype([(name, dtype) for name, attribute, dtype in CHANNELS])
 
-    def __init__(self):
         self.active = None
         self.counter = 0
         self.auto_stop = -1
         self.file = None
+        self.file_name = file_name
+        self.text = file_name.endswith('.txt')
+        self.buffer = np.zeros(self.BLOCK_SIZE, dtype=self.DTYPE)
+        self.i_buffer = 0
+        self.time_flush = 0
+        self.data_type = None  # Type of the logged data, e.g. Sample
+        self.attributes = []  # Attributes of the channels, None if missing in the logged data
 
     def start(self):
         self.active = True
         self.counter = 0
-        file = open('log.txt', 'a')
-        file.write('time, ')
-        file.write('v_set, ')
-        file.write('v_act, ')
-        file.write('v_2, ')
-        file.write('anemometer, ')
-        file.write('power_wind, ')
-        file.write('tip_speed_ratio, ')
-        file.write('beta_set, ')
-        file.write('rot_turb, ')
-        file.write('torque, ')
-        file.write('torque level, ')
-        file.write('current, ')
-        file.write('voltage, ')
-        file.write('power_turb, ')
-        file.write('thrust_force, ')
-        file.write('c_pitch_p, ')
-        file.write('c_pitch_i, ')
-        file.write('c_pitch_d')
-        file.write('\t\n')
-        self.file = file
+        self.i_buffer = 0
+        self.time_flush = time.monotonic()
+        if self.text:
+            self.file = open(self.file_name, 'a')
+            self.file.write(', '.join(self.DTYPE.names))
+            self.file.write('\t\n')
+            return
+
+        if os.path.isfile(self.file_name) and os.path.getsize(self.file_name) > 0:
+            # Append to an existing log only if it holds the same records
+            try:
+                [dtype, offset] = read_header(self.file_name)
+                matching = dtype == self.DTYPE
+            except ValueError:
+                matching = False
+            if not matching:
+                name, extension = os.path.splitext(self.file_name)
+                self.file_name = name + time.strftime('_%Y-%m-%d_%H-%M-%S') + extension
+                warnings.warn('incompatible log file, writing to ' + self.file_name)
+            else:
+                # Cut off an incomplete last record, e.g. after a crash, so appended records stay aligned
+                size = os.path.getsize(self.file_name)
+                length = offset + (size - offset) // dtype.itemsize * dtype.itemsize
+                if length < size:
+                    os.truncate(self.file_name, length)
+        self.file = open(self.file_name, 'ab')
+        if self.file.tell() == 0:
+            header = json.dumps(self.DTYPE.descr).encode()
+            self.file.write(MAGIC + len(header).to_bytes(4, byteorder='little') + header)
 
     def end(self):
         self.active = False
+        self.flush()
         self.file.close()
 
-    def log(self, data):
-        self.file.write(str(time.time()) + ', ')
-        self.file.write(str(data.v_set) + ', ')
-        self.file.write(str(data.v_1) + ', ')
-        self.file.write(str(data.v_2) + ', ')
-        self.file.write(str(data.anemometer) + ', ')
-        self.file.write(str(data.power_wind) + ', ')
-        self.file.write(str(data.tip_speed_ratio) + ', ')
-        self.file.write(str(data.beta_set) + ', ')
-        self.file.write(str(data.rot_turb) + ', ')
-        self.file.write(str(data.torque) + ', ')
-        self.file.write(str(data.torque_level) + ', ')
-        self.file.write(str(data.current) + ', ')
-        self.file.write(str(data.voltage) + ', ')
-        self.file.write(str(data.power_turb) + ', ')
-        self.file.write(str(data.thrust_force) + ', ')
-        self.file.write(str(data.c_pitch_p) + ', ')
-        self.file.write(str(data.c_pitch_i) + ', ')
-        self.file.write(str(data.c_pitch_d) + ', ')
-        self.file.write('\t\n')
+    def log(self, data, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        if type(data) is not self.data_type:
+            # Channels missing in the data are logged as NaN
+            self.data_type = type(data)
+            self.attributes = [attribute if hasattr(data, attribute) else None for name, attribute, dtype in CHANNELS[1:]]
+        self.buffer[self.i_buffer] = (timestamp,) + tuple([np.nan if attribute is None else getattr(data, attribute)
+                                                          for attribute in self.attributes])
+        self.i_buffer += 1
+        if self.i_buffer == self.BLOCK_SIZE or time.monotonic() - self.time_flush > self.FLUSH_INTERVAL:
+            self.flush()
 
         self.counter += 1
         if self.counter == self.auto_stop:
             self.end()
 
+    def flush(self):
+        # Write buffered records to file
+        self.time_flush = time.monotonic()
+        if self.i_buffer == 0:
+            return
+        if self.text:
+            fmt = ['%d' if self.DTYPE[name].kind == 'i' else '%.17g' for name in self.DTYPE.names]
+            np.savetxt(self.file, self.buffer[:self.i_buffer], fmt=fmt, delimiter=', ', newline=', \t\n')
+        else:
+            self.file.write(self.buffer[:self.i_buffer].tobytes())
+        self.file.flush()
+        self.i_buffer = 0
+
     def __del__(self):
         if self.active:
+            self.flush()
             self.file.close()
+
+
+def read_header(file_name):
+    """Read binary log header
+    Returns the type of the records of a binary log file and the position of the first record."""
+
+    with open(file_name, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(file_name + ' is not a MicroWind binary log')
+        header_length = int.from_bytes(file.read(4), byteorder='little')
+        dtype = np.dtype([tuple(field) for field in json.loads(file.read(header_length))])
+    return dtype, len(MAGIC) + 4 + header_length
+
+
+def read_log(file_name):
+    """Read binary log
+    Memory maps the records of a binary log file as numpy structured array. Columns are accessed by name, e.g. log['v_act'].
+    An incomplete last record (e.g. after a crash) is ignored."""
+
+    [dtype, offset] = read_header(file_name)
+    n = (os.path.getsize(file_name) - offset) // dtype.itemsize
+    if n == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(file_name, dtype=dtype, mode='r', offset=offset, shape=(n,))
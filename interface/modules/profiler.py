@@ -0,0 +1,67 @@
+"""
+This file is part ot the MicroWind software to control and plot data of a wind tunnel including a miniature wind turbine
+Copyright (c) 2024 Institute for Wind Energy Systems, Leibniz University Hannover
+The MicroWind software is licensed under GPLv3
+Authors: Felix Prigge
+"""
+
+import time
+import json
+import numpy as np
+
+
+class Profiler:
+    """Stage profiler
+    Measures the duration of the stages of a loop cycle with time.perf_counter_ns().
+    begin() starts a cycle, mark(stage) records the time since the previous mark under the name of the stage
+    and end() records the whole cycle as 'cycle'. The last SIZE durations of every stage are kept in a ring buffer,
+    so a mark costs only one timer call and one array write."""
+
+    def __init__(self, size=1000):
+        # CONSTANTS
+        self.SIZE = size
+        self.PERCENTILES = (50, 95, 99)
+
+        self.durations = dict()  # Ring buffer of durations in ns per stage
+        self.counts = dict()  # Total number of durations recorded per stage
+        self.time_begin = 0
+        self.time_last = 0
+
+    def begin(self):
+        self.time_begin = time.perf_counter_ns()
+        self.time_last = self.time_begin
+
+    def mark(self, stage):
+        now = time.perf_counter_ns()
+        self.record(stage, now - self.time_last)
+        self.time_last = now
+
+    def end(self):
+        self.record('cycle', time.perf_counter_ns() - self.time_begin)
+
+    def record(self, stage, duration):
+        if stage not in self.durations:
+            self.durations[stage] = np.zeros(self.SIZE, dtype=np.int64)
+            self.counts[stage] = 0
+        self.durations[stage][self.counts[stage] % self.SIZE] = duration
+        self.counts[stage] += 1
+
+    def percentiles(self):
+        # Rolling p50, p95 and p99 of every stage in ms
+        result = dict()
+        for stage, durations in self.durations.items():
+            n = min(self.counts[stage], self.SIZE)
+            values = np.percentile(durations[0:n], self.PERCENTILES) * 1e-6
+            result[stage] = {'p' + str(p): float(value) for p, value in zip(self.PERCENTILES, values)}
+        return result
+
+    def report(self):
+        # Table of the percentiles, one stage per line
+        lines = [f'{"stage":<16}' + ''.join(f'{"p" + str(p) + " (ms)":>10}' for p in self.PERCENTILES)]
+        for stage, values in self.percentiles().items():
+            lines.append(f'{stage:<16}' + ''.join(f'{value:>10.2f}' for value in values.values()))
+        return '\n'.join(lines)
+
+    def export(self, file_name='profile.json'):
+        with open(file_name, 'w') as file:
+            json.dump(self.percentiles(), file, indent=4)
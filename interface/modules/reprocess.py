@@ -0,0 +1,142 @@
+"""
+This file is part ot the MicroWind software to control and plot data of a wind tunnel including a miniature wind turbine
+Copyright (c) 2024 Institute for Wind Energy Systems, Leibniz University Hannover
+The MicroWind software is licensed under GPLv3
+Authors: Felix Prigge
+"""
+
+import numpy as np
+from scipy.interpolate import interp1d
+from scipy.signal import lfilter
+import interface.data.calibration_data as cal
+
+
+def calculate_input(rot_fan, rot_turb, thrust, anemometer, potentiometer, torque_level, timestamps, driver=None):
+    """Batch input calculation
+    Vectorized version of Driver.__calculate_input for reprocessing recorded raw values, e.g. after a recalibration.
+    Takes arrays of raw values with one entry per sample and returns a dict of arrays named like the driver attributes.
+    Constants and initial filter states are taken from driver if given, so the results continue the live calculation.
+    Otherwise, the state of a freshly initialized driver is used and the first dt is taken from the second sample.
+    Results equal the live calculation except for floating point rounding.
+    """
+
+    rot_fan = np.asarray(rot_fan, dtype=float)
+    rot_turb = np.asarray(rot_turb, dtype=float)
+    thrust = np.asarray(thrust, dtype=float)
+    anemometer = np.asarray(anemometer, dtype=float)
+    potentiometer = np.asarray(potentiometer, dtype=float)
+    torque_level = np.asarray(torque_level, dtype=int)
+    timestamps = np.asarray(timestamps, dtype=float)
+
+    if driver is not None:
+        air_dens = driver.AIR_DENS
+        rotor_radius = driver.ROTOR_RADIUS
+        rotor_inertia = driver.ROTOR_INERTIA
+        time_last = driver.time_last
+        rot_turb_last = driver.rot_turb_last
+        v_anem_last = driver.v_anem
+        power_aero_last = driver.power_aero
+        v_2_last = driver.v_2
+        interp_anemometer = driver.interp_anemometer
+    else:
+        air_dens = 1.225
+        rotor_radius = 0.16
+        rotor_inertia = 0.2
+        time_last = None
+        rot_turb_last = 0
+        v_anem_last = 0
+        power_aero_last = 0
+        v_2_last = 0
+        interp_anemometer = interp1d(cal.ANEMOMETER_READ, cal.ANEMOMETER_WIND,
+                                     kind='quadratic', fill_value='extrapolate')
+
+    out = dict()
+
+    # Time steps
+    dt = np.empty_like(timestamps)
+    dt[1:] = np.diff(timestamps)
+    if time_last is not None:
+        dt[0] = timestamps[0] - time_last
+    else:
+        dt[0] = dt[1] if dt.size > 1 else 1
+    out['dt'] = dt
+
+    # Tip speed
+    tip_speed = rot_turb / 60 * 2 * 3.14 * rotor_radius
+    out['tip_speed'] = tip_speed
+    out['v_rot'] = tip_speed
+
+    # Torque from drivetrain calibration
+    level = np.maximum(torque_level, 0)
+    torque = np.where(torque_level >= 0,
+                      np.asarray(cal.DRIVETRAIN_FACTOR)[level] * rot_turb + np.asarray(cal.DRIVETRAIN_BIAS)[level],
+                      0.0)
+    out['torque'] = torque
+
+    # Power
+    power_turb = 2 * 3.14 * rot_turb / 60 * torque
+    out['power_turb'] = power_turb
+
+    # Far field wind speed v_1
+    v_1 = np.maximum(cal.WIND_SPEED_FACTOR * rot_fan + cal.WIND_SPEED_BIAS, 0)
+    out['v_1'] = v_1
+
+    # Thermal anemometer wind speed. Filter v = 0.05 * v_read + 0.95 * v_last
+    out['v_anem'] = lfilter([0.05], [1, -0.95], interp_anemometer(anemometer), zi=[0.95 * v_anem_last])[0]
+
+    # Turbine power
+    power_wind = 0.5 * air_dens * v_1 ** 3 * 3.14 * rotor_radius ** 2 * 1000
+    out['power_wind'] = power_wind
+
+    # Aerodynamic rotor power. Filter p = 0.5 * p_last + 0.5 * power_turb + inertia * acceleration
+    rot_turb_prev = np.concatenate(([rot_turb_last], rot_turb[:-1]))
+    power_aero = lfilter([1], [1, -0.5], 0.5 * power_turb + rotor_inertia * (rot_turb - rot_turb_prev) / dt,
+                         zi=[0.5 * power_aero_last])[0]
+    out['power_aero'] = power_aero
+
+    # Power coefficient c_p
+    wind = power_wind > 0
+    out['c_p'] = np.divide(power_turb, power_wind, out=np.zeros_like(power_turb), where=wind)
+    out['c_p_aero'] = np.divide(power_aero, power_wind, out=np.zeros_like(power_aero), where=wind)
+
+    # Tip speed ratio
+    out['tip_speed_ratio'] = np.divide(tip_speed, v_1, out=np.zeros_like(tip_speed), where=v_1 != 0)
+
+    # Rotor thrust force
+    thrust_force = thrust * cal.THRUST_FACTOR
+    out['thrust_force'] = thrust_force
+
+    # Theoretical rotor plane wind speed v_2. Only updated for positive thrust, otherwise the last value is kept
+    radicand = v_1 ** 2 - (2 * thrust_force / 1000 / air_dens / 3.14 / rotor_radius ** 2)
+    v_2 = np.where(radicand > 0, (np.sqrt(np.maximum(radicand, 0)) + v_1) / 2, 0)
+    v_2 = np.maximum(v_2, 0.5 * v_1)
+    updated = thrust_force > 0
+    i_last = np.maximum.accumulate(np.where(updated, np.arange(v_2.size), -1))
+    v_2 = np.where(i_last >= 0, v_2[np.maximum(i_last, 0)], v_2_last)
+    out['v_2'] = v_2
+
+    # Relative wind speed at blade tip
+    out['v_rel'] = (v_2 ** 2 + tip_speed ** 2) ** 0.5
+
+    # Inflow angle phi
+    phi = np.arctan(np.divide(v_2, tip_speed, out=np.zeros_like(v_2), where=tip_speed > 0))
+    out['phi'] = phi
+
+    # Rotor torque force concentrated at blade tip
+    torque_force = np.divide(60 * power_aero, rot_turb, out=np.zeros_like(power_aero), where=rot_turb > 0) \
+        / 3.14 / 2 / rotor_radius
+    out['torque_force'] = torque_force
+
+    # Resultant force, rotated into the inflow direction and split into lift and drag. Shape (n, 2)
+    cos_phi = np.cos(phi)
+    sin_phi = np.sin(phi)
+    res_force_rot_0 = torque_force * cos_phi - thrust_force * sin_phi
+    res_force_rot_1 = torque_force * sin_phi + thrust_force * cos_phi
+    out['res_force'] = np.stack((torque_force, thrust_force), axis=1)
+    out['lift_force'] = np.stack((res_force_rot_1 * sin_phi, res_force_rot_1 * cos_phi), axis=1)
+    out['drag_force'] = np.stack((res_force_rot_0 * cos_phi, -res_force_rot_0 * sin_phi), axis=1)
+
+    # Pitch potentiometer value
+    out['beta_potentiometer'] = cal.POTENTIOMETER_FACTOR * potentiometer + cal.POTENTIOMETER_BIAS
+
+    return out
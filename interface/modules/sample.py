@@ -0,0 +1,63 @@
+"""
+This file is part ot the MicroWind software to control and plot data of a wind tunnel including a miniature wind turbine
+Copyright (c) 2024 Institute for Wind Energy Systems, Leibniz University Hannover
+The MicroWind software is licensed under GPLv3
+Authors: Felix Prigge
+"""
+
+from typing import NamedTuple
+
+
+class Sample(NamedTuple):
+    """Sample
+    Immutable snapshot of the set values and measurements of the driver, emitted by Driver.sample().
+    Charts, logger and controllers read the sample instead of the live driver, so values cannot change while
+    they are processed and samples can be queued or handed to other threads without copying the driver.
+    Constants of the driver, e.g. POWER_RATED, are shared by all samples and accessed as attributes as well."""
+
+    # Time
+    time: float  # [s] Timestamp of the measurement
+    dt: float  # [s] Time since the previous measurement
+    dt_cycle: float  # [s] Time since the previous cycle of the gui loop
+    # Set values
+    v_set: float
+    fan_pwm: int
+    beta_set: float
+    torque_level: int
+    led: bool
+    # Raw measurements
+    rot_fan: int
+    rot_turb: int
+    current: int
+    voltage: int
+    thrust: int
+    anemometer: int
+    potentiometer: int
+    # Calculated values
+    beta_potentiometer: float
+    tip_speed: float
+    tip_speed_ratio: float
+    v_1: float
+    v_2: float
+    v_anem: float
+    v_rot: float
+    v_rel: float
+    phi: float
+    power_wind: float
+    power_turb: float
+    power_aero: float
+    c_p: float
+    c_p_aero: float
+    torque: float
+    torque_force: float
+    thrust_force: float
+    res_force: tuple
+    lift_force: tuple
+    drag_force: tuple
+    # Constants of the driver
+    constants: dict
+
+    def __getattr__(self, name):
+        if name in self.constants:
+            return self.constants[name]
+        raise AttributeError(name)
@@ -0,0 +1,63 @@
+"""
+This file is part ot the MicroWind software to control and plot data of a wind tunnel including a miniature wind turbine
+Copyright (c) 2024 Institute for Wind Energy Systems, Leibniz University Hannover
+The MicroWind software is licensed under GPLv3
+Authors: Felix Prigge
+"""
+
+import time
+
+
+class LoopScheduler:
+    """Loop scheduler
+    Deadline based scheduling of a tkinter after() loop at a fixed rate.
+    Call begin() at the start of a cycle and schedule the next cycle with the delay returned by delay() at its end.
+    Deadlines advance by one period, so the time spent in the cycle is compensated and the rate does not drift.
+    A cycle ending after its deadline is an overrun: the schedule restarts from now instead of catching up.
+    The load (cycle time / period) is filtered and sets the decimation: with load above LOAD_HIGH, charts are
+    only updated every n-th cycle, with load below LOAD_LOW the decimation is reduced again."""
+
+    def __init__(self, rate=20, decimate=True):
+        # CONSTANTS
+        self.LOAD_HIGH = 0.9
+        self.LOAD_LOW = 0.5
+        self.LOAD_FILTER = 0.1
+        self.DECIMATION_MAX = 4
+
+        self.period = 1 / rate
+        self.decimate = decimate
+        self.deadline = time.perf_counter()
+        self.time_begin = self.deadline
+        self.load = 0
+        self.decimation = 1  # Charts are updated every n-th cycle
+        self.cycles = 0
+        self.overruns = 0
+
+    def begin(self):
+        self.time_begin = time.perf_counter()
+        self.cycles += 1
+
+    def charts_due(self):
+        return self.cycles % self.decimation == 0
+
+    def delay(self):
+        # Delay until the next deadline in ms
+        now = time.perf_counter()
+        self.load += self.LOAD_FILTER * ((now - self.time_begin) / self.period - self.load)
+        if self.decimate:
+            if self.load > self.LOAD_HIGH and self.decimation < self.DECIMATION_MAX:
+                self.decimation += 1
+                self.load = (self.LOAD_HIGH + self.LOAD_LOW) / 2
+            elif self.load < self.LOAD_LOW and self.decimation > 1:
+                self.decimation -= 1
+                self.load = (self.LOAD_HIGH + self.LOAD_LOW) / 2
+
+        self.deadline += self.period
+        if self.deadline < now:
+            self.overruns += 1
+            self.deadline = now
+        return int(round((self.deadline - now) * 1000))
+
+    def report(self):
+        return (f'{self.cycles} cycles at {1 / self.period:.0f} Hz, {self.overruns} overruns, '
+                f'load {self.load:.2f}, chart decimation {self.decimation}')
@@ -0,0 +1,193 @@
+"""
+This file is part ot the MicroWind software to control and plot data of a wind tunnel including a miniature wind turbine
+Copyright (c) 2024 Institute for Wind Energy Systems, Leibniz University Hannover
+The MicroWind software is licensed under GPLv3
+Authors: Felix Prigge
+"""
+
+from math import pi, cos, radians
+import numpy as np
+import interface.data.calibration_data as cal
+from interface.modules.transport import Transport
+from interface.modules.clock import Clock
+
+
+class SimulatedArduino(Transport):
+    """Simulated arduino
+    Software-in-the-loop replacement for the serial port. Speaks the same protocol as arduino/arduino.ino:
+    a 1 byte request is answered with a 16 byte data frame, followed by a 5 byte command frame from the driver.
+    Fan, pitch servo, rotor inertia, generator torque levels and thrust load cell are modelled with the calibration data,
+    so the driver sees plausible raw values.
+    By default, every request advances the model by a fixed time step, which runs as fast as the host allows.
+    With time_step=None the model follows the given clock instead, the wall clock by default.
+    Sharing a VirtualClock with the driver runs the simulation faster than real time.
+    """
+
+    def __init__(self, time_step=0.05, noise=True, seed=None, clock=None):
+        super().__init__()
+        # CONSTANTS
+        self.AIR_DENS = 1.225
+        self.ROTOR_RADIUS = 0.16
+        self.ROTOR_AREA = pi * self.ROTOR_RADIUS ** 2
+        self.ROTOR_INERTIA = 5e-5  # [kg m^2] Rotor, hub and generator
+        self.FAN_TIME_CONSTANT = 1.5  # [s]
+        self.SERVO_SPEED = 300  # [°/s]
+        self.START_TORQUE = 0.8  # [mNm] Generator used as motor by the start transistor
+        self.FRICTION_TORQUE = abs(cal.DRIVETRAIN_FRICTION_TORQUE)  # [mNm] Static friction at stand still
+        self.CT_MIN = 0.05
+        self.CT_MAX = 0.5
+        self.ROT_MIN = 6  # [rpm] Slower rotation is reported as stand still by the arduino
+        self.SUB_STEP = 0.01  # [s] Maximum integration step
+        self.ADC_MAX = 1023
+
+        self.time_step = time_step
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        self.clock = clock if clock is not None else Clock()
+        self.time_last = self.clock.now()
+
+        # Aerodynamic rotor model. Power coefficient of the measured c_p lambda curve at 0°.
+        # Pitching shifts the curve along the tip speed ratio, so the optimum at 20° matches TSR_AT_20_DEG
+        cp_tsr = np.loadtxt('data/cp_tsr_0_deg.txt', dtype=float)
+        self.tsr_table = np.concatenate(([0], cp_tsr[:, 0]))
+        self.cp_table = np.concatenate(([0], cp_tsr[:, 1]))
+        self.cp_max = self.cp_table.max()
+        self.cq_table = np.concatenate(([cp_tsr[0, 1] / cp_tsr[0, 0]], cp_tsr[:, 1] / cp_tsr[:, 0]))
+        self.tsr_shift = (self.tsr_table[np.argmax(self.cp_table)] - cal.TSR_AT_20_DEG) / 20
+
+        # Actuators, set by the command frame
+        self.fan_pwm = 0
+        self.servo_time = 1500
+        self.torque_level = 0
+        self.led = 0
+
+        # Model state
+        self.rot_fan = 0  # [rpm]
+        self.omega = 0  # [rad/s]
+        self.beta = (self.servo_time - cal.SERVO_TIME_BIAS) / cal.SERVO_TIME_FACTOR  # [°]
+        self.v_1 = 0  # [m/s]
+        self.torque_gen = 0  # [mNm]
+        self.thrust_force = 0  # [mN]
+
+        # Protocol state
+        self.rx_buffer = bytearray()
+        self.tx_buffer = bytearray()
+        self.wait_for_request = True
+
+    # Transport interface
+    def write(self, data):
+        self.rx_buffer += data
+        # Process the byte stream the same way the arduino loop does
+        while self.rx_buffer:
+            if self.wait_for_request:
+                del self.rx_buffer[0]
+                self.__step()
+                self.tx_buffer += self.__encode_frame()
+                self.wait_for_request = False
+            elif len(self.rx_buffer) >= 5:
+                self.__decode_command(self.rx_buffer[0:5])
+                del self.rx_buffer[0:5]
+                self.wait_for_request = True
+            else:
+                break
+        return len(data)
+
+    def read(self, size=1):
+        data = bytes(self.tx_buffer[0:size])
+        del self.tx_buffer[0:size]
+        return data
+
+    def flushInput(self):
+        self.tx_buffer.clear()
+
+    # Protocol
+    def __decode_command(self, frame):
+        self.fan_pwm = frame[0]
+        self.servo_time = int.from_bytes(frame[1:3], byteorder='little')
+        self.torque_level = int.from_bytes(frame[3:4], byteorder='little', signed=True)
+        self.led = frame[4]
+
+    def __encode_frame(self):
+        rot_turb = self.omega * 60 / 2 / pi
+        if rot_turb < self.ROT_MIN:
+            rot_turb = 0
+        rot_fan = self.rot_fan
+        current = self.torque_gen / cal.GENERATOR_TORQUE_CONSTANT  # [mA]
+        voltage = cal.GENERATOR_TORQUE_CONSTANT * self.omega * 1000  # [mV]
+        thrust = self.thrust_force / cal.THRUST_FACTOR
+        anemometer = np.interp(self.v_1, cal.ANEMOMETER_WIND, cal.ANEMOMETER_READ)
+        potentiometer = (self.beta - cal.POTENTIOMETER_BIAS) / cal.POTENTIOMETER_FACTOR
+
+        if self.noise:
+            rot_fan += self.rng.normal(0, 5) if rot_fan > 0 else 0
+            current += self.rng.normal(0, 2)
+            thrust += self.rng.normal(0, 500)
+            anemometer += self.rng.normal(0, 0.5)
+
+        frame = bytearray()
+        frame += self.__clip(rot_fan, 0, 0xFFFF).to_bytes(2, byteorder='little')
+        frame += self.__clip(rot_turb, 0, 0xFFFF).to_bytes(2, byteorder='little')
+        frame += self.__clip(current, -0x8000, 0x7FFF).to_bytes(2, byteorder='little', signed=True)
+        frame += self.__clip(voltage, -0x8000, 0x7FFF).to_bytes(2, byteorder='little', signed=True)
+        frame += self.__clip(thrust, -0x800000, 0x7FFFFF).to_bytes(4, byteorder='little', signed=True)
+        frame += self.__clip(anemometer, 0, self.ADC_MAX).to_bytes(2, byteorder='little')
+        frame += self.__clip(potentiometer, 0, self.ADC_MAX).to_bytes(2, byteorder='little')
+        return frame
+
+    @staticmethod
+    def __clip(value, lower, upper):
+        return int(min(max(round(value), lower), upper))
+
+    # Physical model
+    def __step(self):
+        if self.time_step is None:
+            now = self.clock.now()
+            dt = now - self.time_last
+            self.time_last = now
+        else:
+            dt = self.time_step
+
+        n = max(1, int(np.ceil(dt / self.SUB_STEP)))
+        for i in range(n):
+            self.__integrate(dt / n)
+
+    def __integrate(self, dt):
+        # Fan as first order system towards the speed belonging to the commanded pwm
+        v_target = (self.fan_pwm - cal.FAN_PWM_BIAS) / cal.FAN_PWM_FACTOR
+        rot_fan_target = (v_target - cal.WIND_SPEED_BIAS) / cal.WIND_SPEED_FACTOR if v_target > 0 else 0
+        self.rot_fan += (rot_fan_target - self.rot_fan) * min(dt / self.FAN_TIME_CONSTANT, 1)
+        self.v_1 = max(cal.WIND_SPEED_FACTOR * self.rot_fan + cal.WIND_SPEED_BIAS, 0)
+
+        # Pitch servo with limited speed
+        beta_target = (self.servo_time - cal.SERVO_TIME_BIAS) / cal.SERVO_TIME_FACTOR
+        d_beta = beta_target - self.beta
+        self.beta += max(min(d_beta, self.SERVO_SPEED * dt), -self.SERVO_SPEED * dt)
+
+        # Aerodynamic torque and thrust
+        if self.v_1 > 0:
+            tsr = self.omega * self.ROTOR_RADIUS / self.v_1
+        else:
+            tsr = 0
+        tsr_eff = tsr + self.tsr_shift * self.beta
+        cq = np.interp(tsr_eff, self.tsr_table, self.cq_table, right=0)
+        cp = np.interp(tsr_eff, self.tsr_table, self.cp_table, right=0)
+        q_wind = 0.5 * self.AIR_DENS * self.v_1 ** 2 * self.ROTOR_AREA
+        torque_aero = q_wind * self.ROTOR_RADIUS * cq * 1000  # [mNm]
+        ct = self.CT_MIN + (self.CT_MAX - self.CT_MIN) * cp / self.cp_max
+        self.thrust_force = q_wind * ct * abs(cos(radians(self.beta))) * 1000  # [mN]
+
+        # Generator torque from the calibrated torque levels
+        rot_turb = self.omega * 60 / 2 / pi
+        if self.torque_level < 0:
+            self.torque_gen = -self.START_TORQUE
+        elif rot_turb > 0:
+            level = min(self.torque_level, len(cal.DRIVETRAIN_FACTOR) - 1)
+            self.torque_gen = cal.DRIVETRAIN_FACTOR[level] * rot_turb + cal.DRIVETRAIN_BIAS[level]
+        else:
+            self.torque_gen = 0
+
+        # Rotor acceleration. Static friction holds the rotor at stand still
+        torque = torque_aero - self.torque_gen
+        if self.omega == 0 and torque < self.FRICTION_TORQUE:
+            return
+        self.omega = max(self.omega + torque / 1000 / self.ROTOR_INERTIA * dt, 0)
@@ -0,0 +1,35 @@
+"""
+This file is part ot the MicroWind software to control and plot data of a wind tunnel including a miniature wind turbine
+Copyright (c) 2024 Institute for Wind Energy Systems, Leibniz University Hannover
+The MicroWind software is licensed under GPLv3
+Authors: Felix Prigge
+"""
+
+
+class Transport:
+    """Transport base class
+    Byte stream between the driver and the turbine. Mirrors the part of the serial.Serial interface used by the driver,
+    so a serial port can be used directly and other devices (e.g. the simulator) only need to implement these methods.
+    """
+
+    def __init__(self):
+        self.is_open = True
+
+    def write(self, data):
+        # Send bytes to the device. Returns the number of bytes written
+        raise NotImplementedError
+
+    def read(self, size=1):
+        # Receive up to size bytes from the device
+        raise NotImplementedError
+
+    def flushInput(self):
+        # Discard received but unread bytes
+        pass
+
+    def flushOutput(self):
+        # Wait until all written bytes are sent
+        pass
+
+    def close(self):
+        self.is_open = False
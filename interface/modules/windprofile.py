@@ -5,42 +5,127 @@ The MicroWind software is licensed under GPLv3
 Authors: Felix Prigge
 """
 
-import time
+import os
 from random import randint
+from itertools import islice
+import numpy as np
+from interface.modules.clock import Clock
 
 
 class WindProfile:
     """Wind Profile
-    Class to open a text file and read wind speeds"""
+    Class to read wind speeds over time from a text file: 8 header lines followed by time [s], speed [m/s] per line.
+    Points are held in NumPy arrays and the current segment is found by bisection, so long measured series
+    with many thousand points can be played at full loop rate.
+    Files larger than STREAM_SIZE are streamed in chunks of CHUNK_SIZE points instead of being loaded at once.
+    Interpolation modes between the points:
+        'step': hold the speed of the last point (default)
+        'linear': linear interpolation
+        'cubic': cubic Hermite interpolation with slopes from the neighbouring points
+    With loop=True the profile restarts after the last point, otherwise the speed is 0 afterward.
+    time_scale > 1 plays the profile faster, < 1 slower."""
 
-    def __init__(self, file):
-        self.wind_profile_start = time.time()
-        self.wind_profile_time = list()
-        self.wind_profile_speed = list()
+    def __init__(self, file_name, clock=None, mode='step', loop=False, time_scale=1):
+        # CONSTANTS
+        self.HEADER_LINES = 8
+        self.STREAM_SIZE = 1e7  # [byte]
+        self.CHUNK_SIZE = 100000
+        self.MODES = ('step', 'linear', 'cubic')
+
+        if mode not in self.MODES:
+            raise ValueError('unknown interpolation mode ' + str(mode) + ', use one of ' + str(self.MODES))
+        self.clock = clock if clock is not None else Clock()
+        self.mode = mode
+        self.loop = loop
+        self.time_scale = time_scale
         self.v_set = 0
-        for i in range(8):
-            file.readline()
-        while True:
-            line = file.readline()
-            if not line:
-                break
-            self.wind_profile_time.append(float(line.split(',')[0]))
-            self.wind_profile_speed.append(float(line.split(',')[1]))
+        self.finished = False
+
+        self.file = open(file_name, 'rt')
+        self.streaming = os.path.getsize(file_name) > self.STREAM_SIZE
+        for i in range(self.HEADER_LINES):
+            self.file.readline()
+        self.data_start = self.file.tell()
+        self.time = np.zeros(0)
+        self.speed = np.zeros(0)
+        self.end_of_file = False
+        self.__read_chunk()
+        self.duration = self.time[-1] if self.end_of_file and len(self.time) > 0 else None
+        self.n_loop = 0  # Number of completed loops
+        self.wind_profile_start = self.clock.time()
+
+    def __read_chunk(self):
+        # Append the next chunk of the file. The last points are kept for the interpolation across the chunk border
+        lines = list(islice(self.file, self.CHUNK_SIZE)) if self.streaming else self.file.readlines()
+        chunk = np.loadtxt(lines, delimiter=',', ndmin=2) if len(lines) > 0 else np.zeros((0, 2))
+        self.time = np.concatenate((self.time[-3:], chunk[:, 0]))
+        self.speed = np.concatenate((self.speed[-3:], chunk[:, 1]))
+        if len(lines) < self.CHUNK_SIZE or not self.streaming:
+            self.end_of_file = True
+            self.file.close()
+
+    def __restart(self):
+        # Read the file again from the first point for the next loop
+        self.file = open(self.file.name, 'rt')
+        self.file.seek(self.data_start)
+        self.time = np.zeros(0)
+        self.speed = np.zeros(0)
+        self.end_of_file = False
+        self.__read_chunk()
+
+    def __locate(self, t):
+        # Wrap the profile time for loops and load the chunks covering it
+        if self.loop and self.duration:
+            n_loop = int(t // self.duration)
+            if n_loop > self.n_loop and self.streaming:
+                self.__restart()
+            self.n_loop = n_loop
+            t -= n_loop * self.duration
+        while not self.end_of_file and t >= self.time[-min(3, len(self.time))]:
+            self.__read_chunk()
+            if self.end_of_file:
+                self.duration = self.time[-1]
+        return t
 
     def stop(self):
-        self.wind_profile_time = list()
-        self.wind_profile_speed = list()
+        self.finished = True
+        self.file.close()
 
     def calc(self):
-        if len(self.wind_profile_time) > 0:
-            if time.time()-self.wind_profile_start > self.wind_profile_time[0]:
-                self.v_set = self.wind_profile_speed[0]
-                del self.wind_profile_time[0]
-                del self.wind_profile_speed[0]
+        if self.finished or len(self.time) == 0:
+            self.v_set = 0
+            return self.v_set
 
-        else:
+        t_profile = (self.clock.time() - self.wind_profile_start) * self.time_scale
+        t = self.__locate(t_profile)
+        if self.loop and self.duration and t >= self.duration:
+            # End of a streamed file reached for the first time
+            t = self.__locate(t_profile)
+
+        if t > self.time[-1]:
             self.v_set = 0
+            self.finished = True
+            return self.v_set
 
+        i = np.searchsorted(self.time, t, side='right') - 1
+        if i < 0:
+            self.v_set = 0
+        elif self.mode == 'step' or i + 1 >= len(self.time):
+            self.v_set = self.speed[i]
+        else:
+            t_0, t_1 = self.time[i], self.time[i + 1]
+            v_0, v_1 = self.speed[i], self.speed[i + 1]
+            x = (t - t_0) / (t_1 - t_0)
+            if self.mode == 'linear':
+                self.v_set = v_0 + x * (v_1 - v_0)
+            else:
+                # Slopes from the neighbouring points, one sided at the ends
+                j_0, j_1 = max(i - 1, 0), min(i + 2, len(self.time) - 1)
+                m_0 = (v_1 - self.speed[j_0]) / (t_1 - self.time[j_0]) * (t_1 - t_0)
+                m_1 = (self.speed[j_1] - v_0) / (self.time[j_1] - t_0) * (t_1 - t_0)
+                self.v_set = ((2 * x ** 3 - 3 * x ** 2 + 1) * v_0 + (x ** 3 - 2 * x ** 2 + x) * m_0
+                              + (-2 * x ** 3 + 3 * x ** 2) * v_1 + (x ** 3 - x ** 2) * m_1)
+        self.v_set = float(self.v_set)
         return self.v_set
 
 
@@ -62,3 +147,78 @@ class RandomWind:
             self.v_set -= self.dv
 
         return self.v_set
+
+
+class TurbulentWind:
+    """Turbulent wind
+    Synthetic turbulent wind speed around a mean speed, following the Kaimal or von Karman spectrum
+    with the given turbulence intensity and length scale.
+    The normalized turbulence is generated in blocks of BLOCK_SIZE samples by inverse FFT with random phases.
+    Consecutive blocks are cross faded over OVERLAP samples, so calc() only interpolates between two samples
+    and the cost per cycle stays constant. The mean speed can change at any time, e.g. with the slider.
+    Call reset() when the turbulent wind is selected, so it starts with a block for the current mean speed."""
+
+    def __init__(self, clock=None, spectrum='kaimal', turbulence_intensity=0.15, length_scale=5, seed=None):
+        # CONSTANTS
+        self.SAMPLE_RATE = 20  # [Hz]
+        self.BLOCK_SIZE = 2048
+        self.OVERLAP = 100
+        self.V_MIN = 0.5  # [m/s] Lower limit of the mean speed to shape the spectrum
+        self.SPECTRA = ('kaimal', 'von_karman')
+
+        if spectrum not in self.SPECTRA:
+            raise ValueError('unknown spectrum ' + str(spectrum) + ', use one of ' + str(self.SPECTRA))
+        self.clock = clock if clock is not None else Clock()
+        self.spectrum = spectrum
+        self.turbulence_intensity = turbulence_intensity
+        self.length_scale = length_scale  # [m]
+        self.rng = np.random.default_rng(seed)
+        self.v_set = 0
+
+        self.block = None
+        self.block_start = 0
+        self.reset(self.V_MIN)
+
+    def __power_spectral_density(self, f, v_mean):
+        # One sided spectrum of the turbulence normalized to a standard deviation of 1
+        time_scale = self.length_scale / max(v_mean, self.V_MIN)
+        if self.spectrum == 'kaimal':
+            return 4 * time_scale / (1 + 6 * f * time_scale) ** (5 / 3)
+        else:
+            return 4 * time_scale / (1 + 70.8 * (f * time_scale) ** 2) ** (5 / 6)
+
+    def __generate_block(self, v_mean):
+        f = np.fft.rfftfreq(self.BLOCK_SIZE, 1 / self.SAMPLE_RATE)
+        amplitude = np.zeros(len(f))
+        amplitude[1:] = np.sqrt(2 * self.__power_spectral_density(f[1:], v_mean) * f[1])
+        phase = self.rng.uniform(0, 2 * np.pi, len(f))
+        block = np.fft.irfft(amplitude * np.exp(1j * phase) * self.BLOCK_SIZE / 2, n=self.BLOCK_SIZE)
+        return block / np.sqrt(np.sum(amplitude ** 2) / 2)
+
+    def __next_block(self, v_mean):
+        # Cross fade from the end of the current block into the next one, the variance stays constant
+        block = self.__generate_block(v_mean)
+        fade = np.linspace(0, np.pi / 2, self.OVERLAP)
+        block[:self.OVERLAP] = np.cos(fade) * self.block[-self.OVERLAP:] + np.sin(fade) * block[:self.OVERLAP]
+        self.block = block
+        self.block_start += (self.BLOCK_SIZE - self.OVERLAP) / self.SAMPLE_RATE
+
+    def reset(self, v_mean):
+        # Start a new block at the current time, e.g. when the turbulent wind is selected
+        self.block = self.__generate_block(v_mean)
+        self.block_start = self.clock.time()
+
+    def calc(self, v_mean):
+        i = (self.clock.time() - self.block_start) * self.SAMPLE_RATE
+        if i >= 2 * (self.BLOCK_SIZE - self.OVERLAP):
+            # Not called for more than a block, start again instead of generating every missed block
+            self.reset(v_mean)
+            i = 0
+        while i >= self.BLOCK_SIZE - self.OVERLAP:
+            self.__next_block(v_mean)
+            i -= self.BLOCK_SIZE - self.OVERLAP
+        j = max(int(i), 0)
+        x = min(max(i - j, 0), 1)
+        turbulence = (1 - x) * self.block[j] + x * self.block[j + 1]
+        self.v_set = max(v_mean * (1 + self.turbulence_intensity * turbulence), 0)
+        return self.v_set
@@ -0,0 +1,45 @@
+"""
+This file is part ot the MicroWind software to control and plot data of a wind tunnel including a miniature wind turbine
+Copyright (c) 2024 Institute for Wind Energy Systems, Leibniz University Hannover
+The MicroWind software is licensed under GPLv3
+Authors: Felix Prigge
+"""
+
+import sys
+import os
+import pathlib
+# Paths given on the command line are relative to the calling directory
+arguments = [os.path.abspath(argument) for argument in sys.argv[1:]]
+# Set working directory to interface/
+os.chdir(str(pathlib.Path(__file__).parent.resolve()))
+# Add parent directory to search path so modules can be imported with absolute paths
+sys.path.append(str(pathlib.Path(__file__).parent.parent.resolve()))
+from interface.modules.driver import Driver
+from interface.modules.logger import Logger
+from interface.modules.transport import Transport
+from interface.modules.capture import replay
+
+
+def main():
+    """Replay capture
+    Feeds a raw frame capture through the driver with the current calibration and writes the results to a data log.
+    Usage: py interface/replay_capture.py interface/capture.bin [log.bin]
+    """
+    if len(arguments) == 0:
+        print(main.__doc__)
+        return
+    capture_file = arguments[0]
+    log_file = arguments[1] if len(arguments) > 1 else os.path.splitext(capture_file)[0] + '_replay.bin'
+
+    # No arduino required, all frames come from the capture
+    driver = Driver(Transport())
+    logger = Logger(log_file)
+    logger.start()
+    for data in replay(capture_file, driver):
+        logger.log(data.sample(), timestamp=data.time_last)
+    logger.end()
+    print('Replayed ' + str(logger.counter) + ' samples to ' + logger.file_name)
+
+
+if __name__ == '__main__':
+    main()